@@ -3,8 +3,12 @@ Resource Configuration Module
 Centralized configuration for all application resources
 """
 import os
+from functools import lru_cache
 from pathlib import Path
-from PySide6.QtGui import QIcon
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from PySide6.QtGui import QIcon
 
 # Base resource directory
 RESOURCES_BASE = Path(__file__).parent
@@ -24,6 +28,9 @@ class ResourcePaths:
     IMAGES = ASSETS / "images"
     UI = ASSETS / "ui"
     
+    # String prefix for icon lookups, joined without building intermediate paths
+    ICONS_STR = str(ICONS) + os.sep
+    
     # Test data subdirectories
     SAMPLES = TEST_DATA / "samples"
     DEMO = TEST_DATA / "demo"
@@ -40,26 +47,36 @@ class ResourcePaths:
     OPEN_ICON = ICONS / "open.png"
     SAVE_ICON = ICONS / "save.png"
     
+    # Resources checked by validate_resources
+    CRITICAL_FILES = (FAVICON,)
+    CRITICAL_DIRS = (ICONS, IMAGES, UI, SAMPLES)
+    
+    @staticmethod
+    def _list_images(dir_path: Path) -> list[Path]:
+        """List image files in a directory with a single scandir pass"""
+        if not dir_path.exists():
+            return []
+        exts = {ext.lower() for ext in VALID_IMAGE_EXTENSIONS}
+        with os.scandir(dir_path) as entries:
+            return [
+                Path(entry.path) for entry in entries
+                if entry.is_file() and os.path.splitext(entry.name)[1].lower() in exts
+            ]
+    
     @classmethod
     def get_sample_images(cls):
         """Get list of all sample image files"""
-        if cls.SAMPLES.exists():
-            return list(cls.SAMPLES.glob("*.png")) + list(cls.SAMPLES.glob("*.jpg"))
-        return []
+        return cls._list_images(cls.SAMPLES)
     
     @classmethod
     def get_demo_images(cls):
         """Get list of all demo image files"""
-        if cls.DEMO.exists():
-            return list(cls.DEMO.glob("*.png")) + list(cls.DEMO.glob("*.jpg"))
-        return []
+        return cls._list_images(cls.DEMO)
     
     @classmethod
     def get_validation_images(cls):
         """Get list of all validation image files"""
-        if cls.VALIDATION.exists():
-            return list(cls.VALIDATION.glob("*.png")) + list(cls.VALIDATION.glob("*.jpg"))
-        return []
+        return cls._list_images(cls.VALIDATION)
     
     @classmethod
     def get_all_test_images(cls):
@@ -83,16 +100,12 @@ class ResourcePaths:
         missing_resources = []
         
         # Check critical files
-        critical_files = [cls.FAVICON]
-        
-        for file_path in critical_files:
+        for file_path in cls.CRITICAL_FILES:
             if not file_path.exists():
                 missing_resources.append(str(file_path))
         
         # Check directories
-        critical_dirs = [cls.ICONS, cls.IMAGES, cls.UI, cls.SAMPLES]
-        
-        for dir_path in critical_dirs:
+        for dir_path in cls.CRITICAL_DIRS:
             if not dir_path.exists():
                 missing_resources.append(str(dir_path))
         
@@ -112,6 +125,7 @@ def get_resource_path(relative_path: str) -> Path:
     return RESOURCES_BASE / relative_path
 
 
+@lru_cache(maxsize=64)
 def get_icon_path(icon_name: str) -> Path:
     """
     Get path for an icon file
@@ -125,12 +139,14 @@ def get_icon_path(icon_name: str) -> Path:
     if not icon_name.endswith('.png'):
         icon_name += '.png'
     
-    return ResourcePaths.ICONS / icon_name
+    return Path(ResourcePaths.ICONS_STR + icon_name)
 
 
-def get_icon(icon_name: str) -> QIcon:
+@lru_cache(maxsize=64)
+def get_icon(icon_name: str) -> 'QIcon':
     """
     Get a QIcon object for a given icon name, with fallback.
+    Icons are cached so each file is only decoded once.
 
     Args:
         icon_name: The name of the icon.
@@ -138,6 +154,8 @@ def get_icon(icon_name: str) -> QIcon:
     Returns:
         A QIcon object. Returns an empty QIcon if not found.
     """
+    from PySide6.QtGui import QIcon
+
     path = get_icon_path(icon_name)
     if path.exists():
         return QIcon(str(path))
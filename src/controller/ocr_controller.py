@@ -1,19 +1,112 @@
 # OCR Controller - Orchestrates the application flow by connecting services to the view.
-from typing import Optional
-import pandas as pd
+import os
+from functools import partial
+from typing import TYPE_CHECKING, List, Optional
+import numpy as np
 import cv2
-from PySide6.QtCore import QObject
+from PySide6.QtCore import QMimeData, QObject, QRunnable, QThreadPool, QTimer, Signal
 from PySide6.QtWidgets import QApplication
+from src.model.ocr_model import smart_imread
 from src.view.main_window import MainWindow
 from src.services.file_service import FileService
 from src.services.ocr_service import OCRService
-from src.services.table_ocr_service import TableOCRService
 from src.services.log_service import get_logger, setup_logging
 
+if TYPE_CHECKING:
+    import pandas as pd
+    from src.services.table_ocr_service import TableOCRService
+
 # Initialize the logging system for the entire application
 setup_logging()
 logger = get_logger(__name__)
 
+# Stands in for a file path while the current image is a webcam frame held in memory
+WEBCAM_SOURCE = "Webcam capture"
+
+# How long the webcam stays open after the last capture
+WEBCAM_IDLE_TIMEOUT_MS = 30_000
+
+
+class ImageDecodeSignals(QObject):
+    # Signals emitted by an ImageDecodeTask.
+    # Path, decoded image and the factor it was downscaled by
+    image_decoded = Signal(str, object, int)
+    finished = Signal()
+
+
+class ImageDecodeTask(QRunnable):
+    # Decodes the selected image on a pooled thread so later extractions can reuse it.
+
+    def __init__(self, image_path: str, parent: Optional[QObject] = None) -> None:
+        # Initializes the task. The signals are parented so they outlive the auto-deleted runnable.
+        super().__init__()
+        self.image_path = image_path
+        self.signals = ImageDecodeSignals(parent)
+
+    def run(self) -> None:
+        # The main execution method, invoked by the thread pool.
+        try:
+            image, scale = smart_imread(self.image_path)
+            if image is not None:
+                self.signals.image_decoded.emit(self.image_path, image, scale)
+        except Exception as e:
+            logger.warning(f"Background decode of {self.image_path} failed: {e}")
+        finally:
+            self.signals.finished.emit()
+
+
+class TableExtractSignals(QObject):
+    # Signals emitted by a TableExtractTask; QRunnable itself cannot own signals.
+    # Carries the table service the task had to build, so the controller can keep it
+    service_created = Signal(object)
+    table_extracted = Signal(object, dict)
+    error_occurred = Signal(str)
+    finished = Signal()
+
+
+class TableExtractTask(QRunnable):
+    # Loads an image and extracts its table data and metadata on a pooled thread.
+
+    def __init__(
+        self,
+        table_ocr_service: Optional['TableOCRService'],
+        image_path: str,
+        image: Optional[np.ndarray] = None,
+        parent: Optional[QObject] = None
+    ) -> None:
+        # Initializes the task. An already decoded image skips the read from disk.
+        # Without a table service, the task builds one first: that probes Tesseract and
+        # waits for the shared OCR model, which must not happen on the GUI thread.
+        # The signals are parented so they outlive the auto-deleted runnable.
+        super().__init__()
+        self.table_ocr_service = table_ocr_service
+        self.image_path = image_path
+        self.image = image
+        self.signals = TableExtractSignals(parent)
+
+    def run(self) -> None:
+        # The main execution method, invoked by the thread pool.
+        try:
+            image = self.image
+            if image is None:
+                # Always full resolution: the table service's kernels and gaps are sized in pixels
+                image = cv2.imread(self.image_path)
+            if image is None:
+                self.signals.error_occurred.emit("Failed to load the image.")
+                return
+            if self.table_ocr_service is None:
+                from src.services.table_ocr_service import TableOCRService
+                self.table_ocr_service = TableOCRService()
+                self.signals.service_created.emit(self.table_ocr_service)
+            table_data = self.table_ocr_service.extract_table_data(image)
+            metadata = self.table_ocr_service.detect_metadata(image)
+            self.signals.table_extracted.emit(table_data, metadata)
+        except Exception as e:
+            logger.error(f"Table extraction process failed with error: {e}", exc_info=True)
+            self.signals.error_occurred.emit(f"An error occurred during table extraction: {str(e)}")
+        finally:
+            self.signals.finished.emit()
+
 
 class OCRController(QObject):
     # The main controller that manages the interaction between the UI and services.
@@ -23,12 +116,47 @@ class OCRController(QObject):
         super().__init__()
         self.view: MainWindow = MainWindow()
         self.file_service: FileService = FileService()
-        self.ocr_service: OCRService = OCRService(languages=['en', 'vi'])
-        self.table_ocr_service: TableOCRService = TableOCRService()
+        # The model loads in the background so the window comes up without waiting for EasyOCR
+        self.ocr_service: OCRService = OCRService(languages=['en', 'vi'], load_async=True)
+        # Built on the first table request; pandas and Tesseract are not needed before that
+        self._table_ocr_service: Optional['TableOCRService'] = None
         self.current_image_path: Optional[str] = None
-        self.current_table_data: Optional[pd.DataFrame] = None
+        # Path whose validation result is cached in _current_image_valid
+        self._validated_image_path: Optional[str] = None
+        self._current_image_valid: bool = False
+        # Decoded pixels of the selected image, filled in the background after selection
+        self._decoded_image: Optional[np.ndarray] = None
+        self._decoded_for_path: Optional[str] = None
+        # Factor the decoded image was downscaled by; only 1 is usable for tables
+        self._decoded_scale: int = 1
+        self.current_table_data: Optional['pd.DataFrame'] = None
         self.current_metadata: dict = {}
+        # Whether the running extraction has replaced the previous text with its first line yet
+        self._streamed_lines: bool = False
+        # The webcam is kept open between captures and released once it has been idle
+        self._webcam: Optional[cv2.VideoCapture] = None
+        self._webcam_idle_timer = QTimer(self)
+        self._webcam_idle_timer.setSingleShot(True)
+        self._webcam_idle_timer.setInterval(WEBCAM_IDLE_TIMEOUT_MS)
+        self._webcam_idle_timer.timeout.connect(self.release_webcam)
         self.connect_signals()
+        # Take the first-inference stall while the window is still coming up
+        self.ocr_service.start_warmup()
+
+    @property
+    def table_ocr_service(self) -> 'TableOCRService':
+        # Returns the table OCR service, importing and creating it on first use.
+        # Table extraction builds it on a pooled thread instead; the features that use
+        # this property need extracted table data, so the service normally exists by then.
+        if self._table_ocr_service is None:
+            from src.services.table_ocr_service import TableOCRService
+            self._table_ocr_service = TableOCRService()
+        return self._table_ocr_service
+
+    @table_ocr_service.setter
+    def table_ocr_service(self, service: 'TableOCRService') -> None:
+        # Replaces the table OCR service.
+        self._table_ocr_service = service
 
     def connect_signals(self) -> None:
         # Connects signals from the view to the controller's handler methods.
@@ -37,6 +165,7 @@ class OCRController(QObject):
         self.view.image_selected.connect(self.on_image_selected)
         self.view.extract_text_requested.connect(self.on_extract_text_requested)
         self.view.extract_table_requested.connect(self.on_extract_table_requested)
+        self.view.extract_batch_requested.connect(self.on_extract_batch_requested)
         self.view.clear_text_requested.connect(self.on_clear_text_requested)
         self.view.copy_text_requested.connect(self.on_copy_text_requested)
         self.view.copy_table_requested.connect(self.on_copy_table_requested)
@@ -56,32 +185,83 @@ class OCRController(QObject):
             if self.file_service.is_valid_image(file_path):
                 self.view.set_image(file_path)
                 self.on_image_selected(file_path)
+                self._validated_image_path = file_path
+                self._current_image_valid = True
             else:
                 self.view.show_warning("The selected file is not a valid image format.")
 
     def on_image_selected(self, image_path: str) -> None:
         # Callback for when an image is selected, either by file dialog or drag-and-drop.
         self.current_image_path = image_path
+        self._validated_image_path = None
+        self._decoded_image = None
+        self._decoded_for_path = None
+        self._decoded_scale = 1
         logger.info(f"Image has been selected for processing: {image_path}")
 
+        task = ImageDecodeTask(image_path, parent=self)
+        task.signals.image_decoded.connect(self.on_image_decoded)
+        task.signals.finished.connect(task.signals.deleteLater)
+        QThreadPool.globalInstance().start(task)
+
+    def on_image_decoded(self, image_path: str, image: np.ndarray, scale: int) -> None:
+        # Keeps the decoded image if it still belongs to the current selection.
+        if image_path == self.current_image_path:
+            self._decoded_image = image
+            self._decoded_for_path = image_path
+            self._decoded_scale = scale
+
+    def get_decoded_image(self) -> Optional[np.ndarray]:
+        # Returns the decoded current image, or None if it has not been decoded yet.
+        if self._decoded_for_path == self.current_image_path:
+            return self._decoded_image
+        return None
+
+    def get_full_resolution_image(self) -> Optional[np.ndarray]:
+        # Returns the decoded current image only if it was decoded at full size;
+        # table extraction then reads a reduced decode's file again at full resolution.
+        if self._decoded_scale == 1:
+            return self.get_decoded_image()
+        return None
+
+    def is_current_image_valid(self) -> bool:
+        # Validates the current image once per selection instead of on every button press.
+        if self._validated_image_path != self.current_image_path:
+            self._current_image_valid = self.file_service.is_valid_image(self.current_image_path)
+            self._validated_image_path = self.current_image_path
+        return self._current_image_valid
+
     def on_extract_text_requested(self) -> None:
         # Initiates the text extraction process for the currently selected image.
         if not self.current_image_path:
             self.view.show_warning("Please select an image before extracting text.")
             return
 
-        if not self.file_service.is_valid_image(self.current_image_path):
+        if not self.is_current_image_valid():
             self.view.show_error("The selected file is not a valid or existing image.")
             return
 
+        # Hand over the decoded image when available so the worker does not read the file again
+        image = self.get_decoded_image()
         self.view.show_progress(True)
+        # Lines are shown as they are recognized; the previous text stays until the first one arrives
+        self._streamed_lines = False
         self.ocr_service.extract_text(
-            self.current_image_path,
+            image if image is not None else self.current_image_path,
             success_callback=self.on_text_extracted,
             error_callback=self.on_extraction_error,
-            finished_callback=self.on_extraction_finished
+            finished_callback=self.on_extraction_finished,
+            line_callback=self.on_text_line_extracted,
+            source_path=self.current_image_path
         )
 
+    def on_text_line_extracted(self, line: str) -> None:
+        # Callback for each recognized line; the first one replaces the previous text.
+        if not self._streamed_lines:
+            self._streamed_lines = True
+            self.view.clear_text()
+        self.view.append_extracted_text(line)
+
     def on_text_extracted(self, text: str) -> None:
         # Callback for when text has been successfully extracted from an image.
         self.view.set_extracted_text(text)
@@ -98,6 +278,34 @@ class OCRController(QObject):
         self.view.show_progress(False)
         logger.info("The OCR extraction process has finished.")
 
+    def on_extract_batch_requested(self) -> None:
+        # Extracts text from several user-selected images in one batched OCR run.
+        file_paths = self.file_service.select_image_files(self.view)
+        if not file_paths:
+            return
+
+        image_paths = [path for path in file_paths if self.file_service.is_valid_image(path)]
+        if not image_paths:
+            self.view.show_warning("None of the selected files is a valid image.")
+            return
+
+        self.view.show_progress(True)
+        self.ocr_service.extract_batch(
+            image_paths,
+            success_callback=partial(self.on_batch_text_extracted, image_paths),
+            error_callback=self.on_extraction_error,
+            finished_callback=self.on_extraction_finished
+        )
+
+    def on_batch_text_extracted(self, image_paths: List[str], texts: List[str]) -> None:
+        # Callback for when text has been extracted from a batch of images.
+        sections = [
+            f"=== {os.path.basename(path)} ===\n{text}" for path, text in zip(image_paths, texts)
+        ]
+        self.view.set_extracted_text("\n\n".join(sections))
+        self.view.show_success(f"Text extraction completed successfully for {len(texts)} images.")
+        logger.info(f"Successfully extracted text from {len(texts)} images.")
+
     def save_text_to_file(self) -> None:
         # Handles the user's request to save the extracted text to a file.
         text_content = self.view.get_text_content()
@@ -120,54 +328,70 @@ class OCRController(QObject):
         # Handles the user's request to copy the extracted text to the clipboard.
         text = self.view.get_text_content()
         if text:
-            clipboard = QApplication.clipboard()
-            clipboard.setText(text)
+            self.set_clipboard_text(text)
             self.view.set_copy_button_text("Copied ✓")
             logger.info("Extracted text has been copied to the clipboard.")
         else:
             self.view.show_warning("There is no text to copy.")
 
+    def set_clipboard_text(self, text: str) -> None:
+        # Hands the text to the clipboard on the next event loop pass, so the
+        # clipboard owner handshake for large outputs does not stall the button handler.
+        QTimer.singleShot(0, lambda: QApplication.clipboard().setText(text))
+
+    def set_clipboard_table(self, tsv_text: str) -> None:
+        """Puts tab-separated table data on the clipboard, also typed as TSV for spreadsheets."""
+        def copy() -> None:
+            mime = QMimeData()
+            mime.setData('text/tab-separated-values', tsv_text.encode('utf-8'))
+            mime.setText(tsv_text)
+            QApplication.clipboard().setMimeData(mime)
+
+        QTimer.singleShot(0, copy)
+
+    def on_table_ocr_service_created(self, service: 'TableOCRService') -> None:
+        # Keeps the table service a TableExtractTask built, unless another task got there first.
+        if self._table_ocr_service is None:
+            self._table_ocr_service = service
+
     def on_extract_table_requested(self) -> None:
         """Initiates the table extraction process for the currently selected image."""
         if not self.current_image_path:
             self.view.show_warning("Please select an image before extracting table.")
             return
 
-        if not self.file_service.is_valid_image(self.current_image_path):
+        if not self.is_current_image_valid():
             self.view.show_error("The selected file is not a valid or existing image.")
             return
 
-        try:
-            self.view.show_progress(True)
-            
-            # Load image
-            image = cv2.imread(self.current_image_path)
-            if image is None:
-                self.view.show_error("Failed to load the image.")
-                return
-            
-            # Extract table data
-            self.current_table_data = self.table_ocr_service.extract_table_data(image)
-            
-            # Extract metadata
-            self.current_metadata = self.table_ocr_service.detect_metadata(image)
-            
-            # Update UI
-            self.view.set_table_data(self.current_table_data)
-            self.view.set_metadata(self.current_metadata)
-            
-            if not self.current_table_data.empty:
-                self.view.show_success(f"Table extraction completed successfully. Found {len(self.current_table_data)} rows and {len(self.current_table_data.columns)} columns.")
-            else:
-                self.view.show_warning("No table data was detected in the image.")
-            
-            logger.info("Successfully extracted table from the image.")
-            
-        except Exception as e:
-            self.view.show_error(f"An error occurred during table extraction: {str(e)}")
-            logger.error(f"Table extraction process failed with error: {e}")
-        finally:
-            self.view.show_progress(False)
+        self.view.show_progress(True)
+        task = TableExtractTask(
+            self._table_ocr_service, self.current_image_path, image=self.get_full_resolution_image(), parent=self
+        )
+        task.signals.service_created.connect(self.on_table_ocr_service_created)
+        task.signals.table_extracted.connect(self.on_table_extracted)
+        task.signals.error_occurred.connect(self.view.show_error)
+        task.signals.finished.connect(self.on_table_extraction_finished)
+        task.signals.finished.connect(task.signals.deleteLater)
+        QThreadPool.globalInstance().start(task)
+
+    def on_table_extracted(self, table_data: 'pd.DataFrame', metadata: dict) -> None:
+        """Callback for when table data and metadata have been extracted from an image."""
+        self.current_table_data = table_data
+        self.current_metadata = metadata
+        self.view.set_table_data(table_data)
+        self.view.set_metadata(metadata)
+
+        if not table_data.empty:
+            self.view.show_success(f"Table extraction completed successfully. Found {len(table_data)} rows and {len(table_data.columns)} columns.")
+        else:
+            self.view.show_warning("No table data was detected in the image.")
+
+        logger.info("Successfully extracted table from the image.")
+
+    def on_table_extraction_finished(self) -> None:
+        """Callback for when the table extraction is finished, regardless of outcome."""
+        self.view.show_progress(False)
 
     def on_copy_table_requested(self) -> None:
         """Handles the user's request to copy the table to clipboard."""
@@ -180,8 +404,7 @@ class OCRController(QObject):
             clipboard_text = self.table_ocr_service.dataframe_to_clipboard_format(self.current_table_data)
             
             # Copy to clipboard
-            clipboard = QApplication.clipboard()
-            clipboard.setText(clipboard_text)
+            self.set_clipboard_table(clipboard_text)
             
             self.view.show_success("Table data copied to clipboard in tab-separated format.")
             logger.info("Table data has been copied to the clipboard.")
@@ -232,30 +455,32 @@ class OCRController(QObject):
     def on_capture_webcam_requested(self) -> None:
         """Handles the user's request to capture from webcam."""
         try:
-            # Initialize webcam
-            cap = cv2.VideoCapture(0)
-            if not cap.isOpened():
-                self.view.show_error("Could not access webcam.")
-                return
+            # Open the webcam unless it is still open from a recent capture
+            if self._webcam is None or not self._webcam.isOpened():
+                self._webcam = cv2.VideoCapture(0)
+                if not self._webcam.isOpened():
+                    self.release_webcam()
+                    self.view.show_error("Could not access webcam.")
+                    return
 
             # Capture frame
-            ret, frame = cap.read()
-            cap.release()
+            ret, frame = self._webcam.read()
 
             if not ret:
+                self.release_webcam()
                 self.view.show_error("Failed to capture image from webcam.")
                 return
 
-            # Save temporary image
-            import tempfile
-            import os
-            temp_dir = tempfile.gettempdir()
-            temp_path = os.path.join(temp_dir, "webcam_capture.jpg")
-            cv2.imwrite(temp_path, frame)
+            self._webcam_idle_timer.start()
 
-            # Set as current image
-            self.view.set_image(temp_path)
-            self.on_image_selected(temp_path)
+            # Keep the frame in memory as the current image instead of a temporary file
+            self.view.set_image_array(frame, WEBCAM_SOURCE)
+            self.current_image_path = WEBCAM_SOURCE
+            self._validated_image_path = WEBCAM_SOURCE
+            self._current_image_valid = True
+            self._decoded_image = frame
+            self._decoded_for_path = WEBCAM_SOURCE
+            self._decoded_scale = 1
             
             self.view.show_success("Webcam image captured successfully.")
             logger.info("Successfully captured image from webcam.")
@@ -264,8 +489,17 @@ class OCRController(QObject):
             self.view.show_error(f"Error capturing from webcam: {str(e)}")
             logger.error(f"Webcam capture failed: {e}")
 
+    def release_webcam(self) -> None:
+        """Closes the webcam if it is open."""
+        self._webcam_idle_timer.stop()
+        if self._webcam is not None:
+            self._webcam.release()
+            self._webcam = None
+            logger.info("Webcam has been released.")
+
     def cleanup(self) -> None:
         # Performs necessary cleanup operations before the application exits.
+        self.release_webcam()
         self.ocr_service.cleanup()
         logger.info("Application cleanup has been completed.")
 
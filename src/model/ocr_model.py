@@ -2,33 +2,193 @@
 OCR Model - Handles image processing and text extraction
 """
 import os
-import easyocr
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from PIL import Image
 import cv2
 import numpy as np
-from typing import Optional, List
+from typing import Any, Dict, Iterator, Optional, List, Sequence, Tuple, Union
+
+# EasyOCR readers by language set and precision, shared by every OCRModel in the process
+_READER_CACHE: Dict[Tuple[Tuple[str, ...], str], Any] = {}
+_READER_LOCK = threading.Lock()
+# Whether torch's thread pools have been sized for this process, done once before the first reader
+_torch_threads_configured = False
+
+# Images whose long side exceeds these sizes are decoded at 1/2 or 1/4 resolution
+REDUCED_DECODE_THRESHOLDS: Tuple[Tuple[int, int, int], ...] = (
+    (4000, cv2.IMREAD_REDUCED_COLOR_4, 4),
+    (2000, cv2.IMREAD_REDUCED_COLOR_2, 2),
+)
+
+# Most images recognized together in one batched EasyOCR call
+BATCHED_READ_SIZE = 8
+
+# Most prepared images batch_extract keeps waiting for same-sized partners
+MAX_PENDING_IMAGES = 2 * BATCHED_READ_SIZE
+
+
+def smart_imread(image_path: str) -> Tuple[Optional[np.ndarray], int]:
+    """
+    Read a color image, letting the decoder downscale very large images
+
+    Only the file header is parsed to get the image size, so the full
+    resolution image is never materialized for large camera photos.
+
+    Args:
+        image_path: Path to the image file
+
+    Returns:
+        Tuple of (image or None if it could not be read, downscale factor)
+    """
+    try:
+        with Image.open(image_path) as header:
+            long_side = max(header.size)
+    except Exception:
+        long_side = 0
+
+    for threshold, flag, scale in REDUCED_DECODE_THRESHOLDS:
+        if long_side > threshold:
+            return cv2.imread(image_path, flag), scale
+    return cv2.imread(image_path), 1
+
+
+def _cast_inputs_to_half(module: Any, args: tuple) -> tuple:
+    """Forward pre-hook casting floating point tensor inputs to float16"""
+    import torch
+    return tuple(arg.half() if torch.is_tensor(arg) and arg.is_floating_point() else arg
+                 for arg in args)
+
+
+def _cast_outputs_to_float(module: Any, args: tuple, output: Any) -> Any:
+    """Forward hook casting float16 tensor outputs back to float32 for EasyOCR's post-processing"""
+    import torch
+    if torch.is_tensor(output):
+        return output.float() if output.is_floating_point() else output
+    if isinstance(output, tuple):
+        return tuple(_cast_outputs_to_float(module, args, item) for item in output)
+    return output
+
+
+def _convert_reader_to_half(reader: Any) -> None:
+    """
+    Run an EasyOCR reader's detector and recognizer in half precision
+
+    The networks' weights are converted to float16; inputs are cast on the
+    way in and outputs back to float32 on the way out, so EasyOCR's own
+    pre- and post-processing keep working on float32.
+
+    Args:
+        reader: An EasyOCR reader whose networks live on a CUDA device
+    """
+    for name in ('detector', 'recognizer'):
+        network = getattr(reader, name).half()
+        network.register_forward_pre_hook(_cast_inputs_to_half)
+        network.register_forward_hook(_cast_outputs_to_float)
+        setattr(reader, name, network)
+
+
+def _configure_torch_threads() -> None:
+    """
+    Size torch's CPU thread pools once, before the first reader runs
+
+    Each inference spreads its matmuls over all but one core, leaving that
+    core for the UI thread. Torch's inter-op pool is set to a single thread,
+    since EasyOCR runs its networks one operator after another and
+    concurrency comes from the service's thread pool instead. The inter-op
+    size can only be set before torch starts any parallel work, so a late
+    call keeps torch's default.
+    """
+    global _torch_threads_configured
+    if _torch_threads_configured:
+        return
+    _torch_threads_configured = True
+    import torch
+    torch.set_num_threads(max(1, (os.cpu_count() or 1) - 1))
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        pass
 
 
 class OCRModel:
     """Model class for OCR text recognition using EasyOCR"""
 
-    def __init__(self, languages: List[str] = ['en', 'vi']):
+    def __init__(self, languages: List[str] = ['en', 'vi'], confidence_threshold: float = 0.5,
+                 min_size: int = 20, precision: str = 'fp16'):
         """
         Initialize OCR model with specified languages
 
         Args:
             languages: List of language codes for OCR recognition
+            confidence_threshold: Minimum recognition confidence for text to be kept
+            min_size: Smallest text region, in pixels, EasyOCR's detector passes on
+                to the recognizer; raising it skips recognition of small specks early
+            precision: 'fp16' runs the detector and recognizer in half precision
+                when they are on a CUDA device, and the recognizer with int8
+                weights on the CPU; 'fp32' keeps full precision on both
         """
+        if precision not in ('fp16', 'fp32'):
+            raise ValueError(f"Unsupported precision: {precision}")
         self.languages = languages
+        self.precision = precision
+        self.confidence_threshold = confidence_threshold
+        self.min_size = min_size
         self.reader = None
+        # Per-thread grayscale buffer, reused while the image size is unchanged
+        self._scratch = threading.local()
+        # Run preprocessing through OpenCV's T-API when an OpenCL device is usable
+        self._use_umat = cv2.ocl.haveOpenCL() and cv2.ocl.useOpenCL()
+        if self._use_umat:
+            self._warmup_preprocessing()
         self._initialize_reader()
 
+    def _warmup_preprocessing(self) -> None:
+        """
+        Build the OpenCL preprocessing kernels before the first real image
+
+        OpenCV compiles OpenCL kernels on first use, which otherwise stalls the
+        first extraction. Compiled binaries are kept on disk between runs in
+        the directory named by OPENCV_OPENCL_CACHE_DIR (OpenCV picks a per-user
+        cache location when it is unset).
+        """
+        self.preprocess_image(np.zeros((32, 32, 3), dtype=np.uint8))
+
     def _initialize_reader(self) -> None:
-        """Initialize EasyOCR reader"""
-        try:
-            self.reader = easyocr.Reader(self.languages)
-        except Exception as e:
-            raise RuntimeError(f"Failed to initialize OCR reader: {str(e)}")
+        """Initialize EasyOCR reader, reusing a cached one for the same languages"""
+        self.reader = self._get_reader(self.languages, self.precision)
+
+    @classmethod
+    def warmup(cls, languages: Sequence[str] = ('en', 'vi'), precision: str = 'fp16') -> None:
+        """
+        Load the EasyOCR reader for the given languages ahead of first use
+
+        Args:
+            languages: List of language codes for OCR recognition
+            precision: Precision of the reader's networks, 'fp16' or 'fp32'
+        """
+        cls._get_reader(languages, precision)
+
+    @staticmethod
+    def _get_reader(languages: Sequence[str], precision: str = 'fp16') -> Any:
+        """Get the cached EasyOCR reader for a language set and precision, creating it once"""
+        key = (tuple(sorted(languages)), precision)
+        with _READER_LOCK:
+            reader = _READER_CACHE.get(key)
+            if reader is None:
+                # Imported here so torch is only loaded once a reader is actually built
+                import easyocr
+                _configure_torch_threads()
+                try:
+                    # On the CPU, EasyOCR dynamically quantizes the recognizer's LSTM and
+                    # Linear layers to int8 (FBGEMM/QNNPACK kernels) when asked to
+                    reader = easyocr.Reader(list(languages), quantize=precision != 'fp32')
+                except Exception as e:
+                    raise RuntimeError(f"Failed to initialize OCR reader: {str(e)}")
+                if precision == 'fp16' and str(reader.device).startswith('cuda'):
+                    _convert_reader_to_half(reader)
+                _READER_CACHE[key] = reader
+            return reader
 
     def load_image(self, image_path: str) -> Optional[np.ndarray]:
         """
@@ -40,15 +200,30 @@ class OCRModel:
         Returns:
             Loaded image as numpy array or None if failed
         """
+        return self._load_image_scaled(image_path)[0]
+
+    def _load_image_scaled(self, image_path: str) -> Tuple[np.ndarray, int]:
+        """
+        Load image from file path, decoding large images at reduced resolution
+
+        Args:
+            image_path: Path to the image file
+
+        Returns:
+            Tuple of (loaded image, factor the image was downscaled by)
+
+        The image is always 3-channel BGR uint8 and already rotated according
+        to its EXIF orientation, since cv2.imread applies both when decoding.
+        """
         if not os.path.exists(image_path):
             raise FileNotFoundError(f"Image file not found: {image_path}")
 
         try:
             # Load image using OpenCV
-            image = cv2.imread(image_path)
+            image, scale = smart_imread(image_path)
             if image is None:
                 raise ValueError(f"Could not load image: {image_path}")
-            return image
+            return image, scale
         except Exception as e:
             raise RuntimeError(f"Error loading image: {str(e)}")
 
@@ -57,48 +232,97 @@ class OCRModel:
         Preprocess image for better OCR results
 
         Args:
-            image: Input image as numpy array
+            image: Input BGR image as numpy array, as returned by load_image
 
         Returns:
             Preprocessed image
         """
-        # Check and correct image orientation
-        height, width = image.shape[:2]
-        if height > width:
-            image = cv2.rotate(image, cv2.ROTATE_90_CLOCKWISE)
+        if self._use_umat:
+            try:
+                return self._apply_preprocessing(cv2.UMat(image)).get()
+            except cv2.error:
+                # Some OpenCL drivers reject these kernels; stay on the CPU path from now on
+                self._use_umat = False
+        return self._apply_preprocessing(image, gray_dst=self._scratch_buffer(image.shape[:2]))
+
+    def _scratch_buffer(self, shape: Tuple[int, ...]) -> np.ndarray:
+        """
+        Get the calling thread's reusable uint8 grayscale buffer
+
+        Args:
+            shape: Required buffer shape
+
+        Returns:
+            Buffer of the requested shape, reallocated only when the shape changes
+        """
+        buf = getattr(self._scratch, 'gray', None)
+        if buf is None or buf.shape != shape:
+            buf = np.empty(shape, np.uint8)
+            self._scratch.gray = buf
+        return buf
+
+    @staticmethod
+    def _apply_preprocessing(image, gray_dst: Optional[np.ndarray] = None):
+        """
+        Run the preprocessing filters on a numpy array or cv2.UMat
+
+        Only the grayscale intermediate is written to a caller buffer; the
+        thresholded result is returned to callers that keep it (batches hold
+        several at once), so it is always freshly allocated.
+
+        Args:
+            image: Input BGR image, either an array or a UMat
+            gray_dst: Optional buffer for the grayscale intermediate
 
-        # Convert to grayscale
-        if len(image.shape) == 3:
-            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        else:
-            gray = image
+        Returns:
+            Preprocessed image of the same type as the input
+        """
+        # Convert to grayscale first so every later pass touches one channel
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY, dst=gray_dst)
 
         # Apply adaptive thresholding
         processed = cv2.adaptiveThreshold(
             gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 2
         )
 
-        # Noise reduction
-        processed = cv2.medianBlur(processed, 3)
+        # Noise reduction, in place on the thresholded image
+        cv2.medianBlur(processed, 3, dst=processed)
 
         return processed
 
-    def extract_text(self, image_path: str, preprocess: bool = True) -> str:
+    def extract_text(self, image: Union[str, np.ndarray], preprocess: bool = True) -> str:
         """
         Extract text from image using OCR
 
         Args:
-            image_path: Path to the image file
+            image: Path to the image file, or an already decoded BGR image
             preprocess: Whether to preprocess the image
 
         Returns:
             Extracted text as string
         """
+        return '\n'.join(self.iter_text_lines(image, preprocess))
+
+    def iter_text_lines(self, image: Union[str, np.ndarray], preprocess: bool = True) -> Iterator[str]:
+        """
+        Extract text from image using OCR, yielding each confident line as it is read
+
+        Args:
+            image: Path to the image file, or an already decoded BGR image
+            preprocess: Whether to preprocess the image
+
+        Yields:
+            Recognized lines of text, in reading order
+        """
         if not self.reader:
             raise RuntimeError("OCR reader not initialized")
 
-        # Load image
-        image = self.load_image(image_path)
+        # Load image unless it is already in memory
+        if not isinstance(image, np.ndarray):
+            image = self.load_image(image)
+        elif image.ndim == 2:
+            # Bring in-memory grayscale input to the BGR layout load_image guarantees
+            image = cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
 
         # Preprocess if requested
         if preprocess:
@@ -106,18 +330,84 @@ class OCRModel:
 
         try:
             # Extract text using EasyOCR
-            results = self.reader.readtext(image)
+            results = self.reader.readtext(image, min_size=self.min_size)
+        except Exception as e:
+            raise RuntimeError(f"Error during text extraction: {str(e)}")
+
+        for _, text, confidence in results:
+            if confidence > self.confidence_threshold:
+                yield text
 
-            # Combine all detected text
-            extracted_text = []
-            for (bbox, text, confidence) in results:
-                if confidence > 0.5:  # Filter out low confidence results
-                    extracted_text.append(text)
+    def batch_extract(self, image_paths: List[str], preprocess: bool = True) -> List[str]:
+        """
+        Extract text from several images with as few EasyOCR calls as possible
 
-            return '\n'.join(extracted_text)
+        Images are loaded and preprocessed in parallel, and recognition
+        starts as soon as the first ones are ready, so later images are
+        prepared while earlier ones are being read. Images of one size
+        (e.g. frames from the same camera) are recognized together in
+        batched calls, even when other sizes come in between; an image
+        without a same-sized partner is read on its own.
 
+        Args:
+            image_paths: Paths to the image files
+            preprocess: Whether to preprocess the images
+
+        Returns:
+            Extracted text for each image, in input order
+        """
+        if not self.reader:
+            raise RuntimeError("OCR reader not initialized")
+        if not image_paths:
+            return []
+
+        def prepare(image_path: str) -> np.ndarray:
+            image = self.load_image(image_path)
+            return self.preprocess_image(image) if preprocess else image
+
+        texts: List[str] = [''] * len(image_paths)
+        # Prepared images waiting for a batch, by size, each with its input position
+        pending: Dict[Tuple[int, ...], List[Tuple[int, np.ndarray]]] = {}
+        pending_count = 0
+
+        def flush(shape: Tuple[int, ...]) -> None:
+            nonlocal pending_count
+            entries = pending.pop(shape)
+            pending_count -= len(entries)
+            for (index, _), text in zip(entries, self._read_run([image for _, image in entries])):
+                texts[index] = text
+
+        with ThreadPoolExecutor(max_workers=min(len(image_paths), os.cpu_count() or 1)) as executor:
+            for index, image in enumerate(executor.map(prepare, image_paths)):
+                pending.setdefault(image.shape, []).append((index, image))
+                pending_count += 1
+                if len(pending[image.shape]) == BATCHED_READ_SIZE:
+                    flush(image.shape)
+                elif pending_count > MAX_PENDING_IMAGES:
+                    # Bound the memory held by waiting images: read the oldest size group now
+                    flush(next(iter(pending)))
+            while pending:
+                flush(next(iter(pending)))
+        return texts
+
+    def _read_run(self, images: List[np.ndarray]) -> List[str]:
+        """Recognize a run of same-sized images, batching them when there is more than one"""
+        try:
+            if len(images) > 1:
+                batch_results = self.reader.readtext_batched(
+                    images, batch_size=BATCHED_READ_SIZE, min_size=self.min_size
+                )
+            else:
+                batch_results = [self.reader.readtext(images[0], min_size=self.min_size)]
         except Exception as e:
             raise RuntimeError(f"Error during text extraction: {str(e)}")
+        return [self._combine_text(results) for results in batch_results]
+
+    def _combine_text(self, results: List[tuple]) -> str:
+        """Join the recognized text of one image, dropping low confidence results"""
+        return '\n'.join(
+            text for _, text, confidence in results if confidence > self.confidence_threshold
+        )
 
     def get_text_with_confidence(self, image_path: str, preprocess: bool = True) -> List[tuple]:
         """
@@ -134,7 +424,7 @@ class OCRModel:
             raise RuntimeError("OCR reader not initialized")
 
         # Load image
-        image = self.load_image(image_path)
+        image, scale = self._load_image_scaled(image_path)
 
         # Preprocess if requested
         if preprocess:
@@ -142,8 +432,39 @@ class OCRModel:
 
         try:
             # Extract text with details using EasyOCR
-            results = self.reader.readtext(image)
+            results = self.reader.readtext(image, min_size=self.min_size)
+            if scale != 1:
+                # Report boxes at the resolution of the file, not the reduced decode
+                results = [
+                    ([[x * scale, y * scale] for x, y in bbox], text, confidence)
+                    for bbox, text, confidence in results
+                ]
             return results
 
         except Exception as e:
             raise RuntimeError(f"Error during text extraction: {str(e)}")
+
+
+# Process-wide model shared by every caller of get_shared_model
+_shared_model: Optional[OCRModel] = None
+_shared_model_lock = threading.Lock()
+
+
+def get_shared_model(languages: Sequence[str] = ('en', 'vi')) -> OCRModel:
+    """
+    Get the process-wide OCR model, building it on first use
+
+    The EasyOCR weights are only loaded once per process; the model is
+    rebuilt only when a different language set is requested.
+
+    Args:
+        languages: Language codes for OCR recognition
+
+    Returns:
+        The shared OCRModel instance
+    """
+    global _shared_model
+    with _shared_model_lock:
+        if _shared_model is None or _shared_model.languages != list(languages):
+            _shared_model = OCRModel(languages=list(languages))
+        return _shared_model
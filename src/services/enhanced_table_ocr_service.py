@@ -5,31 +5,118 @@ import cv2
 import numpy as np
 import pandas as pd
 import pytesseract
-import easyocr
+import csv
+import hashlib
+import io
 import json
-from typing import List, Dict, Tuple, Optional, Any
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Tuple, Optional, Any, Union
 from PIL import Image
 import re
-from sklearn.cluster import DBSCAN
 from src.services.log_service import get_logger
 
+try:
+    # libtesseract bindings; reading in-process avoids starting a tesseract process per cell
+    from tesserocr import PyTessBaseAPI, PSM
+except ImportError:
+    PyTessBaseAPI = PSM = None
+
 logger = get_logger(__name__)
 
+# Characters Tesseract may output for a table cell: digits, Latin and Vietnamese letters, punctuation
+_TESS_CHAR_WHITELIST = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyzÀÁÂÃÈÉÊÌÍÒÓÔÕÙÚĂĐĨŨƠàáâãèéêìíòóôõùúăđĩũơƯĂẠẢẤẦẨẪẬẮẰẲẴẶẸẺẼỀỀỂưăạảấầẩẫậắằẳẵặẹẻẽềềểỄỆỈỊỌỎỐỒỔỖỘỚỜỞỠỢỤỦỨỪễệỉịọỏốồổỗộớờởỡợụủứừỬỮỰỲỴÝỶỸửữựỳỵýỷỹ .,()-'
+# Tesseract configuration for reading a single cell as one word
+_TESS_CELL_CONFIG = f'--psm 8 -c tessedit_char_whitelist={_TESS_CHAR_WHITELIST}'
+
+# A number as it appears in a grade table: optional sign, decimal point or comma, optional percent
+_NUMERIC_RE = re.compile(r'^[+-]?(?:\d+(?:[.,]\d*)?|[.,]\d+)\s*%?$')
+
+# Preprocessed images kept per service, so a repeated call on the same pixels is not recomputed
+_PREPROCESS_CACHE_SIZE = 4
+
+# libtesseract handles per thread, shared by every service instance; a handle serves one image at a time
+_TESS_HANDLES = threading.local()
+
+# Long-lived threads reading cells with Tesseract, so their handles are kept between tables
+_cell_executor: Optional[ThreadPoolExecutor] = None
+_cell_executor_lock = threading.Lock()
+
+
+def _get_cell_executor() -> ThreadPoolExecutor:
+    """Get the shared Tesseract cell executor, creating it on first use"""
+    global _cell_executor
+    with _cell_executor_lock:
+        if _cell_executor is None:
+            _cell_executor = ThreadPoolExecutor(
+                max_workers=os.cpu_count() or 1, thread_name_prefix='tesseract-cell'
+            )
+        return _cell_executor
+
+
+def _split_by_gaps(positions: np.ndarray, gap: float) -> List[np.ndarray]:
+    """
+    Group 1-D positions, starting a new group wherever sorted neighbours are more than gap apart
+    
+    This yields the same clusters as DBSCAN(eps=gap, min_samples=1) on 1-D data.
+    
+    Args:
+        positions: Positions to group
+        gap: Largest distance between neighbouring positions of one group
+        
+    Returns:
+        Index arrays into positions, one per group, ordered by position
+    """
+    order = np.argsort(positions, kind='stable')
+    breaks = np.flatnonzero(np.diff(positions[order]) > gap) + 1
+    return np.split(order, breaks)
+
+
+def _cuda_available() -> bool:
+    """Check whether OpenCV was built with CUDA and can see a device"""
+    try:
+        return cv2.cuda.getCudaEnabledDeviceCount() > 0
+    except Exception:
+        return False
+
 
 class EnhancedTableOCRService:
     """Enhanced service for detecting and processing tables with advanced preprocessing and clustering"""
     
+    # Sharpening kernel, built once; float32 is what filter2D works with for 8-bit images
+    _SHARPEN_KERNEL = np.array([[-1, -1, -1],
+                                [-1,  9, -1],
+                                [-1, -1, -1]], dtype=np.float32)
+    _SHARPEN_KERNEL.setflags(write=False)
+    
+    # Structuring elements for closing gaps and removing noise, built once
+    _CLOSE_KERNEL = cv2.getStructuringElement(cv2.MORPH_RECT, (3, 3))
+    _OPEN_KERNEL = cv2.getStructuringElement(cv2.MORPH_RECT, (2, 2))
+    _CLOSE_KERNEL.setflags(write=False)
+    _OPEN_KERNEL.setflags(write=False)
+    
     def __init__(self):
         """Initialize the enhanced table OCR service"""
         self.confidence_threshold = 0.5
         self.min_table_area = 1000
         self.easyocr_reader = None
+        # Per-thread preprocessing buffers, reused while the image size is unchanged
+        self._scratch = threading.local()
+        # Most recently preprocessed images, keyed by a hash of their input pixels
+        self._preprocess_cache: 'OrderedDict[Tuple, np.ndarray]' = OrderedDict()
+        self._preprocess_lock = threading.Lock()
+        # Run line detection on the GPU when OpenCV has CUDA support
+        self.use_gpu = _cuda_available()
         self._initialize_easyocr()
     
     def _initialize_easyocr(self):
         """Initialize EasyOCR reader as fallback"""
         try:
-            self.easyocr_reader = easyocr.Reader(['en', 'vi'])
+            # Reuse the process-wide model so the weights are only loaded once
+            from src.model.ocr_model import get_shared_model
+            self.easyocr_reader = get_shared_model(['en', 'vi']).reader
             logger.info("EasyOCR reader initialized successfully")
         except Exception as e:
             logger.warning(f"Failed to initialize EasyOCR reader: {e}")
@@ -39,46 +126,139 @@ class EnhancedTableOCRService:
         """
         Enhanced preprocessing with grayscale conversion and adaptive threshold
         
+        The last few results are cached by input content and returned read-only,
+        so preprocessing the same image again costs one hash of its pixels.
+        
         Args:
             image: Input image as numpy array
             
         Returns:
             Preprocessed image optimized for table detection
         """
+        key = self._image_key(image)
+        with self._preprocess_lock:
+            cached = self._preprocess_cache.get(key)
+            if cached is not None:
+                self._preprocess_cache.move_to_end(key)
+                return cached
+        
+        processed = self._preprocess_image(image)
+        
+        # An already clean, straight input comes back as is; it belongs to the caller, so is not cached
+        if processed is not image:
+            processed.setflags(write=False)
+            with self._preprocess_lock:
+                self._preprocess_cache[key] = processed
+                while len(self._preprocess_cache) > _PREPROCESS_CACHE_SIZE:
+                    self._preprocess_cache.popitem(last=False)
+        
+        return processed
+    
+    @staticmethod
+    def _image_key(image: np.ndarray) -> Tuple:
+        """
+        Build a cache key from an image's shape, dtype and pixel content
+        
+        Args:
+            image: Input image
+            
+        Returns:
+            Hashable key that differs whenever any pixel differs, barring hash collisions
+        """
+        digest = hashlib.blake2b(np.ascontiguousarray(image), digest_size=8).digest()
+        return image.shape, image.dtype.str, digest
+    
+    def _preprocess_image(self, image: np.ndarray) -> np.ndarray:
+        """
+        Run the preprocessing pipeline behind enhanced_preprocess_image
+        
+        Args:
+            image: Input image as numpy array
+            
+        Returns:
+            Preprocessed image optimized for table detection
+        """
+        # A binary image (e.g. one this method already produced) needs no blur, threshold or cleanup
+        if image.ndim == 2 and image.dtype == np.uint8 and not cv2.countNonZero(cv2.inRange(image, 1, 254)):
+            return self._straighten(image)
+        
+        use_opencl = cv2.ocl.useOpenCL()
+        size = image.shape[:2]
+        
+        def scratch(name: str) -> Optional[np.ndarray]:
+            # OpenCL manages its own device buffers; only reuse host memory on the CPU path
+            return None if use_opencl else self._scratch_buffer(name, size)
+        
         # Convert to grayscale if needed
         if len(image.shape) == 3:
-            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY, dst=self._scratch_buffer('gray', size))
         else:
-            gray = image.copy()
+            gray = image
+        
+        # Keep the filter chain on the OpenCL device when the T-API is enabled
+        if use_opencl:
+            gray = cv2.UMat(gray)
         
         # Apply Gaussian blur to reduce noise
-        blurred = cv2.GaussianBlur(gray, (5, 5), 0)
+        blurred = cv2.GaussianBlur(gray, (5, 5), 0, dst=scratch('blurred'))
         
         # Enhanced adaptive thresholding
         binary = cv2.adaptiveThreshold(
-            blurred, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 15, 2
+            blurred, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 15, 2,
+            dst=scratch('binary')
         )
         
         # Morphological operations to clean up the image
-        kernel_close = np.ones((3, 3), np.uint8)
-        kernel_open = np.ones((2, 2), np.uint8)
-        
         # Close small gaps
-        cleaned = cv2.morphologyEx(binary, cv2.MORPH_CLOSE, kernel_close)
-        # Remove small noise
-        cleaned = cv2.morphologyEx(cleaned, cv2.MORPH_OPEN, kernel_open)
+        cleaned = cv2.morphologyEx(binary, cv2.MORPH_CLOSE, self._CLOSE_KERNEL, dst=scratch('closed'))
+        # Remove small noise; written to a new array since it may be returned as is
+        cleaned = cv2.morphologyEx(cleaned, cv2.MORPH_OPEN, self._OPEN_KERNEL)
         
-        # Deskew the image
-        deskewed = self._deskew_image(cleaned)
+        # Contour analysis runs on the CPU, so download once here
+        if isinstance(cleaned, cv2.UMat):
+            cleaned = cleaned.get()
         
-        # Apply sharpening
-        sharpened = self._sharpen_image(deskewed)
+        return self._straighten(cleaned)
+    
+    def _straighten(self, image: np.ndarray) -> np.ndarray:
+        """
+        Deskew a binary image, sharpening it only if it was rotated
         
-        return sharpened
+        Args:
+            image: Binary image
+            
+        Returns:
+            Deskewed image, or the input itself if no rotation was needed
+        """
+        deskewed = self._deskew_image(image)
+        
+        # Sharpening leaves a pure 0/255 image unchanged, so it only matters
+        # for the interpolated edges a rotation introduces
+        if deskewed is image:
+            return deskewed
+        
+        return self._sharpen_image(deskewed)
+    
+    def _scratch_buffer(self, name: str, shape: Tuple[int, ...]) -> np.ndarray:
+        """
+        Get a reusable uint8 buffer owned by the calling thread
+        
+        Args:
+            name: Buffer name within the thread's scratch space
+            shape: Required buffer shape
+            
+        Returns:
+            Buffer of the requested shape, reallocated only when the shape changes
+        """
+        buf = getattr(self._scratch, name, None)
+        if buf is None or buf.shape != shape:
+            buf = np.empty(shape, np.uint8)
+            setattr(self._scratch, name, buf)
+        return buf
     
     def _deskew_image(self, image: np.ndarray) -> np.ndarray:
         """
-        Correct skew in the image using contour analysis
+        Correct skew in the image using its largest connected component
         
         Args:
             image: Binary image
@@ -86,28 +266,17 @@ class EnhancedTableOCRService:
         Returns:
             Deskewed image
         """
-        # Find contours
-        contours, _ = cv2.findContours(image, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-        
-        if not contours:
+        h, w = image.shape[:2]
+        # Contour angles on small crops such as single cells are mostly noise
+        if h <= 200 or w <= 200:
             return image
-            
-        # Find the largest contour (likely the table)
-        largest_contour = max(contours, key=cv2.contourArea)
-        
-        # Get minimum area rectangle
-        rect = cv2.minAreaRect(largest_contour)
-        angle = rect[2]
         
-        # Correct the angle
-        if angle < -45:
-            angle = -(90 + angle)
-        else:
-            angle = -angle
+        angle = self._estimate_skew_angle(image)
+        if angle is None:
+            return image
             
         # Only apply rotation if angle is significant
         if abs(angle) > 0.5:
-            h, w = image.shape
             center = (w // 2, h // 2)
             M = cv2.getRotationMatrix2D(center, angle, 1.0)
             rotated = cv2.warpAffine(image, M, (w, h), flags=cv2.INTER_CUBIC, borderMode=cv2.BORDER_REPLICATE)
@@ -115,6 +284,44 @@ class EnhancedTableOCRService:
             
         return image
     
+    def _estimate_skew_angle(self, image: np.ndarray) -> Optional[float]:
+        """
+        Estimate the skew of the largest connected component
+        
+        Large images are measured at a quarter of their size. INTER_AREA keeps
+        any pixel that had ink nonzero, so thin rulings survive the shrink.
+        
+        Args:
+            image: Binary image
+            
+        Returns:
+            Skew angle in degrees within (-45, 45], or None if the image is empty
+        """
+        # Images that stay at least 200 pixels on each side after the shrink
+        if min(image.shape[:2]) >= 800:
+            image = cv2.resize(image, None, fx=0.25, fy=0.25, interpolation=cv2.INTER_AREA)
+        
+        # Label connected components; the stats come back as one array
+        count, labels, stats, _ = cv2.connectedComponentsWithStats(image, connectivity=8)
+        
+        if count < 2:
+            return None
+            
+        # Find the largest component (likely the table); label 0 is the zero background
+        largest = 1 + int(np.argmax(stats[1:, cv2.CC_STAT_AREA]))
+        
+        # Get minimum area rectangle around the component's pixels
+        rect = cv2.minAreaRect(cv2.findNonZero((labels == largest).view(np.uint8)))
+        angle = rect[2]
+        
+        # Bring the angle into (-45, 45]; OpenCV reports it in [-90, 0) or (0, 90] depending on version
+        if angle > 45:
+            angle -= 90
+        elif angle <= -45:
+            angle += 90
+            
+        return angle
+    
     def _sharpen_image(self, image: np.ndarray) -> np.ndarray:
         """
         Apply sharpening filter to enhance text clarity
@@ -125,15 +332,12 @@ class EnhancedTableOCRService:
         Returns:
             Sharpened image
         """
-        kernel = np.array([[-1, -1, -1],
-                          [-1,  9, -1],
-                          [-1, -1, -1]])
-        sharpened = cv2.filter2D(image, -1, kernel)
+        sharpened = cv2.filter2D(image, -1, self._SHARPEN_KERNEL)
         return sharpened
     
     def detect_lines_with_hough(self, image: np.ndarray) -> Tuple[List[Tuple], List[Tuple]]:
         """
-        Detect lines using HoughLines and findContours
+        Detect lines using HoughLines, on the GPU when CUDA is available
         
         Args:
             image: Preprocessed binary image
@@ -141,13 +345,23 @@ class EnhancedTableOCRService:
         Returns:
             Tuple of (horizontal_lines, vertical_lines)
         """
-        # Detect horizontal lines
-        horizontal_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (50, 1))
-        horizontal_lines_img = cv2.morphologyEx(image, cv2.MORPH_OPEN, horizontal_kernel)
+        if self.use_gpu:
+            try:
+                return self._detect_lines_cuda(image)
+            except Exception as e:
+                logger.warning(f"CUDA line detection failed, using the CPU from now on: {e}")
+                self.use_gpu = False
+        
+        # Ink pixels as 1 on a 0 background; the preprocessed image has dark lines on white
+        _, ink = cv2.threshold(image, 127, 1, cv2.THRESH_BINARY_INV)
         
-        # Detect vertical lines
-        vertical_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (1, 50))
-        vertical_lines_img = cv2.morphologyEx(image, cv2.MORPH_OPEN, vertical_kernel)
+        # A pixel lies on a line if almost all of the 50 pixels around it along that direction are ink.
+        # The window sums are at most 50, so they fit in the uint8 output.
+        horizontal_runs = cv2.boxFilter(ink, -1, (50, 1), normalize=False)
+        horizontal_lines_img = cv2.compare(horizontal_runs, 45, cv2.CMP_GT)
+        
+        vertical_runs = cv2.boxFilter(ink, -1, (1, 50), normalize=False)
+        vertical_lines_img = cv2.compare(vertical_runs, 45, cv2.CMP_GT)
         
         # Use HoughLines to detect line segments
         horizontal_lines = cv2.HoughLinesP(
@@ -158,20 +372,52 @@ class EnhancedTableOCRService:
             vertical_lines_img, 1, np.pi/180, threshold=50, minLineLength=100, maxLineGap=10
         )
         
-        # Convert to list of tuples
-        h_lines = []
-        if horizontal_lines is not None:
-            for line in horizontal_lines:
-                x1, y1, x2, y2 = line[0]
-                h_lines.append((x1, y1, x2, y2))
+        return self._segments_to_tuples(horizontal_lines), self._segments_to_tuples(vertical_lines)
+    
+    def _detect_lines_cuda(self, image: np.ndarray) -> Tuple[List[Tuple], List[Tuple]]:
+        """
+        Detect lines like detect_lines_with_hough, with every pass on the GPU
+        
+        The image is uploaded once and only the segment endpoints are
+        downloaded.
+        
+        Args:
+            image: Preprocessed binary image
+            
+        Returns:
+            Tuple of (horizontal_lines, vertical_lines)
+        """
+        gpu_image = cv2.cuda_GpuMat()
+        gpu_image.upload(image)
+        
+        # Ink pixels as 255 on a 0 background
+        _, ink = cv2.cuda.threshold(gpu_image, 127, 255, cv2.THRESH_BINARY_INV)
+        
+        detector = cv2.cuda.createHoughSegmentDetector(1, np.pi/180, 100, 10, 4096, 50)
         
-        v_lines = []
-        if vertical_lines is not None:
-            for line in vertical_lines:
-                x1, y1, x2, y2 = line[0]
-                v_lines.append((x1, y1, x2, y2))
+        lines = []
+        for ksize in ((50, 1), (1, 50)):
+            # The CUDA box filter averages, so more than 45 of 50 ink pixels is a mean above 232
+            runs = cv2.cuda.createBoxFilter(cv2.CV_8UC1, cv2.CV_8UC1, ksize).apply(ink)
+            _, line_mask = cv2.cuda.threshold(runs, 232, 255, cv2.THRESH_BINARY)
+            lines.append(self._segments_to_tuples(detector.detect(line_mask).download()))
         
-        return h_lines, v_lines
+        return lines[0], lines[1]
+    
+    @staticmethod
+    def _segments_to_tuples(segments: Optional[np.ndarray]) -> List[Tuple]:
+        """
+        Convert Hough segments to (x1, y1, x2, y2) tuples
+        
+        Args:
+            segments: Segment array from HoughLinesP or the CUDA detector, or None
+            
+        Returns:
+            List of segment tuples
+        """
+        if segments is None:
+            return []
+        return [tuple(segment) for segment in segments.reshape(-1, 4)]
     
     def segment_cells(self, image: np.ndarray, h_lines: List[Tuple], v_lines: List[Tuple]) -> List[Dict]:
         """
@@ -191,84 +437,195 @@ class EnhancedTableOCRService:
             logger.warning("No lines detected for cell segmentation")
             return cells
         
-        # Extract y-coordinates from horizontal lines and sort
-        h_coords = sorted(set([line[1] for line in h_lines] + [line[3] for line in h_lines]))
-        # Extract x-coordinates from vertical lines and sort
-        v_coords = sorted(set([line[0] for line in v_lines] + [line[2] for line in v_lines]))
-        
-        # Create cells from grid intersections
-        for i in range(len(h_coords) - 1):
-            for j in range(len(v_coords) - 1):
-                top = h_coords[i]
-                bottom = h_coords[i + 1]
-                left = v_coords[j]
-                right = v_coords[j + 1]
-                
-                # Ensure valid cell dimensions
-                if bottom - top > 10 and right - left > 10:
-                    cell = {
-                        'row': i,
-                        'col': j,
-                        'top': top,
-                        'bottom': bottom,
-                        'left': left,
-                        'right': right,
-                        'bbox': (left, top, right - left, bottom - top)
-                    }
-                    cells.append(cell)
+        # Snap the y-coordinates of horizontal lines to one value per grid line
+        h_coords = self._snap_grid_coordinates(np.asarray(h_lines)[:, [1, 3]].ravel())
+        # Same for the x-coordinates of vertical lines
+        v_coords = self._snap_grid_coordinates(np.asarray(v_lines)[:, [0, 2]].ravel())
+        
+        # Create cells from grid intersections, keeping those with valid dimensions
+        h = np.asarray(h_coords)
+        v = np.asarray(v_coords)
+        tops, bottoms = h[:-1], h[1:]
+        lefts, rights = v[:-1], v[1:]
+        valid = ((bottoms - tops > 10)[:, None]) & ((rights - lefts > 10)[None, :])
+        rows, cols = np.nonzero(valid)
+        
+        cells = [
+            {
+                'row': i,
+                'col': j,
+                'top': top,
+                'bottom': bottom,
+                'left': left,
+                'right': right,
+                'bbox': (left, top, right - left, bottom - top)
+            }
+            for i, j, top, bottom, left, right in zip(
+                rows.tolist(), cols.tolist(),
+                tops[rows].tolist(), bottoms[rows].tolist(),
+                lefts[cols].tolist(), rights[cols].tolist()
+            )
+        ]
         
         return cells
     
+    def _snap_grid_coordinates(self, coords: Union[List[int], np.ndarray], eps: int = 5) -> List[int]:
+        """
+        Merge near-duplicate line endpoints into one coordinate per grid line
+        
+        Hough returns several segments for one thick ruling (e.g. y=102, 103,
+        105); left as they are, they create thin phantom rows and columns.
+        
+        Args:
+            coords: Endpoint coordinates along one axis
+            eps: Largest distance between endpoints of the same grid line
+            
+        Returns:
+            Sorted grid line coordinates, each the mean of its endpoints
+        """
+        values = np.asarray(coords, dtype=np.float64)
+        return [int(round(values[group].mean())) for group in _split_by_gaps(values, eps)]
+    
     def extract_text_from_cells(self, image: np.ndarray, cells: List[Dict]) -> List[Dict]:
         """
         Extract text from individual cells using OCR
         
+        All cells are recognized together in one EasyOCR call; Tesseract only
+        reads the cells EasyOCR is not confident about, or every cell when no
+        EasyOCR reader is available.
+        
         Args:
-            image: Original image
+            image: Preprocessed image the cells were segmented from
             cells: List of cell dictionaries
             
         Returns:
             List of cells with extracted text
         """
+        # Cells large enough to hold text; the rest stay empty
+        readable_cells = []
         for cell in cells:
-            try:
-                # Extract cell region
-                left, top, width, height = cell['bbox']
-                cell_img = image[top:top+height, left:left+width]
-                
-                # Skip if cell is too small
-                if cell_img.shape[0] < 10 or cell_img.shape[1] < 10:
-                    cell['text'] = ''
-                    continue
-                
-                # Preprocess cell image
-                cell_processed = self.enhanced_preprocess_image(cell_img)
-                
-                # Extract text using Tesseract first, fallback to EasyOCR
-                try:
-                    text = pytesseract.image_to_string(
-                        cell_processed, 
-                        config='--psm 8 -c tessedit_char_whitelist=0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyzÀÁÂÃÈÉÊÌÍÒÓÔÕÙÚĂĐĨŨƠàáâãèéêìíòóôõùúăđĩũơƯĂẠẢẤẦẨẪẬẮẰẲẴẶẸẺẼỀỀỂưăạảấầẩẫậắằẳẵặẹẻẽềềểỄỆỈỊỌỎỐỒỔỖỘỚỜỞỠỢỤỦỨỪễệỉịọỏốồổỗộớờởỡợụủứừỬỮỰỲỴÝỶỸửữựỳỵýỷỹ .,()-'
-                    ).strip()
-                except Exception:
-                    # Fallback to EasyOCR
-                    if self.easyocr_reader:
-                        results = self.easyocr_reader.readtext(cell_processed)
-                        text = ' '.join([result[1] for result in results if result[2] > 0.3])
-                    else:
-                        text = ''
-                
-                cell['text'] = text.strip()
-                
-            except Exception as e:
-                logger.warning(f"Error extracting text from cell {cell.get('row', 0)},{cell.get('col', 0)}: {e}")
-                cell['text'] = ''
+            cell['text'] = ''
+            left, top, width, height = cell['bbox']
+            cell_img = image[top:top+height, left:left+width]
+            if cell_img.shape[0] >= 10 and cell_img.shape[1] >= 10:
+                readable_cells.append(cell)
+        
+        if self.easyocr_reader and readable_cells:
+            tesseract_cells = self._recognize_cells_with_easyocr(image, readable_cells)
+        else:
+            tesseract_cells = readable_cells
+        
+        # Tesseract runs outside the GIL (in-process or as a subprocess), so cells are read in parallel
+        if len(tesseract_cells) > 1:
+            texts = _get_cell_executor().map(lambda cell: self._ocr_single_cell(image, cell), tesseract_cells)
+        else:
+            texts = [self._ocr_single_cell(image, cell) for cell in tesseract_cells]
+        for cell, text in zip(tesseract_cells, texts):
+            cell['text'] = text
         
         return cells
     
+    def _ocr_single_cell(self, image: np.ndarray, cell: Dict) -> str:
+        """
+        Read one cell of the table with Tesseract
+        
+        Args:
+            image: Preprocessed image the cells were segmented from
+            cell: Cell dictionary with its bbox
+            
+        Returns:
+            Recognized text, or an empty string if reading failed
+        """
+        try:
+            # The image is already binarized, so the cell is read as sliced
+            left, top, width, height = cell['bbox']
+            cell_img = image[top:top+height, left:left+width]
+            
+            return self._read_cell_with_tesseract(cell_img).strip()
+            
+        except Exception as e:
+            logger.warning(f"Error extracting text from cell {cell.get('row', 0)},{cell.get('col', 0)}: {e}")
+            return ''
+    
+    def _read_cell_with_tesseract(self, cell_img: np.ndarray) -> str:
+        """
+        Read one cell with Tesseract, in-process when tesserocr is installed
+        
+        Args:
+            cell_img: Binarized cell image
+            
+        Returns:
+            Recognized text
+        """
+        api = self._tesseract_api()
+        if api is None:
+            return pytesseract.image_to_string(cell_img, config=_TESS_CELL_CONFIG)
+        api.SetImage(Image.fromarray(cell_img))
+        return api.GetUTF8Text()
+    
+    def _tesseract_api(self) -> Optional[Any]:
+        """
+        Get the calling thread's libtesseract handle, creating it on first use
+        
+        Returns:
+            A PyTessBaseAPI set up for single-word cells, or None when tesserocr
+            is unavailable or could not load its language data
+        """
+        api = getattr(_TESS_HANDLES, 'api', None)
+        if api is None:
+            api = False
+            if PyTessBaseAPI is not None:
+                try:
+                    api = PyTessBaseAPI(psm=PSM.SINGLE_WORD, lang='eng')
+                    api.SetVariable('tessedit_char_whitelist', _TESS_CHAR_WHITELIST)
+                except Exception as e:
+                    logger.warning(f"Failed to initialize tesserocr, using pytesseract: {e}")
+                    api = False
+            _TESS_HANDLES.api = api
+        return api or None
+    
+    def _recognize_cells_with_easyocr(self, image: np.ndarray, cells: List[Dict]) -> List[Dict]:
+        """
+        Recognize text in known cell boxes with a single EasyOCR call
+        
+        The cell boxes are passed straight to the recognizer, so EasyOCR skips
+        its text detector and can batch the crops in one forward pass.
+        
+        Args:
+            image: Image the cell boxes refer to
+            cells: Cells to fill in; their 'text' is updated in place
+            
+        Returns:
+            Cells that were not read with enough confidence
+        """
+        boxes = []
+        cells_by_corner = {}
+        for cell in cells:
+            left, top, width, height = cell['bbox']
+            boxes.append([left, left + width, top, top + height])
+            cells_by_corner[(left, top)] = cell
+        
+        try:
+            results = self.easyocr_reader.recognize(
+                image, horizontal_list=boxes, free_list=[], batch_size=16
+            )
+        except Exception as e:
+            logger.warning(f"EasyOCR cell recognition failed: {e}")
+            return cells
+        
+        # Results come back sorted by position, so match them to cells by box corner
+        confident = set()
+        for box, text, confidence in results:
+            cell = cells_by_corner.get((int(box[0][0]), int(box[0][1])))
+            if cell is not None and confidence >= 0.3:
+                cell['text'] = ' '.join(filter(None, [cell['text'], text.strip()]))
+                confident.add(id(cell))
+        
+        return [cell for cell in cells if id(cell) not in confident]
+    
     def cluster_cells_by_position(self, cells: List[Dict]) -> List[List[Dict]]:
         """
-        Cluster cells by y-coordinate (rows) using DBSCAN, then sort by x-coordinate (columns)
+        Cluster cells by y-coordinate (rows), then sort by x-coordinate (columns)
         
         Args:
             cells: List of cell dictionaries
@@ -279,27 +636,14 @@ class EnhancedTableOCRService:
         if not cells:
             return []
         
-        # Extract top positions for clustering
-        positions = np.array([[cell['top']] for cell in cells])
+        # Split the top positions into rows, top to bottom
+        tops = np.fromiter((cell['top'] for cell in cells), dtype=np.int64, count=len(cells))
         
-        # Use DBSCAN to cluster by y-coordinate (top position)
-        clustering = DBSCAN(eps=20, min_samples=1).fit(positions)
-        labels = clustering.labels_
-        
-        # Group cells by cluster labels (rows)
-        rows = {}
-        for i, label in enumerate(labels):
-            if label not in rows:
-                rows[label] = []
-            rows[label].append(cells[i])
-        
-        # Sort rows by average y-coordinate and cells within rows by x-coordinate
-        sorted_rows = []
-        for label in sorted(rows.keys(), key=lambda l: np.mean([cell['top'] for cell in rows[l]])):
-            row_cells = sorted(rows[label], key=lambda cell: cell['left'])
-            sorted_rows.append(row_cells)
-        
-        return sorted_rows
+        # Sort cells within rows by x-coordinate
+        return [
+            sorted((cells[i] for i in group), key=lambda cell: cell['left'])
+            for group in _split_by_gaps(tops, 20)
+        ]
     
     def create_dataframe_from_clustered_cells(self, clustered_rows: List[List[Dict]]) -> pd.DataFrame:
         """
@@ -325,18 +669,55 @@ class EnhancedTableOCRService:
             row_data.extend([''] * (max_cols - len(row_data)))
             table_data.append(row_data)
         
-        # Create DataFrame
-        if table_data:
-            # Check if first row looks like headers
-            if len(table_data) > 1 and self._is_header_row(table_data[0]):
-                df = pd.DataFrame(table_data[1:], columns=table_data[0])
-            else:
-                columns = [f'Column_{i+1}' for i in range(max_cols)]
-                df = pd.DataFrame(table_data, columns=columns)
-        else:
-            df = pd.DataFrame()
+        return self._dataframe_from_rows(table_data)
+    
+    def create_dataframe_from_grid(self, cells: List[Dict]) -> pd.DataFrame:
+        """
+        Create DataFrame from grid-aligned cells using their row and column indices
         
-        return df
+        The texts are scattered straight into a rows x columns array, so no
+        per-row grouping or padding is needed. Rows and columns segment_cells
+        skipped are left out.
+        
+        Args:
+            cells: Cells produced by segment_cells, with extracted text
+            
+        Returns:
+            DataFrame with table data
+        """
+        if not cells:
+            return pd.DataFrame()
+        
+        # Compact the segmented indices to consecutive table positions
+        rows = np.fromiter((cell['row'] for cell in cells), dtype=np.int64, count=len(cells))
+        cols = np.fromiter((cell['col'] for cell in cells), dtype=np.int64, count=len(cells))
+        row_values, row_index = np.unique(rows, return_inverse=True)
+        col_values, col_index = np.unique(cols, return_inverse=True)
+        
+        table = np.full((len(row_values), len(col_values)), '', dtype=object)
+        table[row_index, col_index] = [cell['text'] for cell in cells]
+        
+        return self._dataframe_from_rows(table.tolist())
+    
+    def _dataframe_from_rows(self, table_data: List[List[str]]) -> pd.DataFrame:
+        """
+        Create DataFrame from equally long rows, using the first row as header when it looks like one
+        
+        Args:
+            table_data: Rows of cell texts
+            
+        Returns:
+            DataFrame with table data
+        """
+        if not table_data:
+            return pd.DataFrame()
+        
+        # Check if first row looks like headers
+        if len(table_data) > 1 and self._is_header_row(table_data[0]):
+            return pd.DataFrame(table_data[1:], columns=table_data[0])
+        
+        columns = [f'Column_{i+1}' for i in range(len(table_data[0]))]
+        return pd.DataFrame(table_data, columns=columns)
     
     def _is_header_row(self, row: List[str]) -> bool:
         """
@@ -349,10 +730,7 @@ class EnhancedTableOCRService:
             True if row is likely a header
         """
         # Simple heuristic: if most cells contain text (not numbers)
-        text_count = 0
-        for cell in row:
-            if cell and not self._is_numeric(cell):
-                text_count += 1
+        text_count = sum(1 for cell in row if cell and not _NUMERIC_RE.match(cell.strip()))
         
         return text_count > len(row) / 2
     
@@ -366,13 +744,8 @@ class EnhancedTableOCRService:
         Returns:
             True if text is numeric
         """
-        try:
-            # Handle Vietnamese decimal separator
-            text_clean = text.replace(',', '.').replace('%', '').strip()
-            float(text_clean)
-            return True
-        except ValueError:
-            return False
+        # Vietnamese numbers may use a decimal comma
+        return _NUMERIC_RE.match(text.strip()) is not None
     
     def extract_enhanced_table_data(self, image: np.ndarray) -> pd.DataFrame:
         """
@@ -402,15 +775,11 @@ class EnhancedTableOCRService:
                 logger.warning("No cells detected, falling back to OCR-based extraction")
                 return self._fallback_ocr_extraction(processed_image)
             
-            # Step 4: Extract text from cells
-            cells_with_text = self.extract_text_from_cells(image, cells)
-            
-            # Step 5: Cluster cells by position
-            clustered_rows = self.cluster_cells_by_position(cells_with_text)
-            logger.info(f"Clustered into {len(clustered_rows)} rows")
+            # Step 4: Extract text from cells, sliced from the preprocessed image the lines came from
+            cells_with_text = self.extract_text_from_cells(processed_image, cells)
             
-            # Step 6: Create DataFrame
-            df = self.create_dataframe_from_clustered_cells(clustered_rows)
+            # Step 5: Create DataFrame; the cells are already aligned to the snapped grid
+            df = self.create_dataframe_from_grid(cells_with_text)
             
             logger.info(f"Successfully extracted table with {len(df)} rows and {len(df.columns)} columns")
             return df
@@ -431,12 +800,18 @@ class EnhancedTableOCRService:
             DataFrame from OCR text extraction
         """
         try:
-            # Use pytesseract to get detailed OCR data
-            ocr_data = pytesseract.image_to_data(
+            # Use pytesseract to get detailed OCR data as TSV, parsed by pandas in one go.
+            # Output.DATAFRAME would let pandas guess the text column's type, turning
+            # words such as '08' or 'NA' into numbers and NaN.
+            tsv = pytesseract.image_to_data(
                 image, 
-                output_type=pytesseract.Output.DICT,
+                output_type=pytesseract.Output.STRING,
                 config='--psm 6'
             )
+            ocr_data = pd.read_csv(
+                io.StringIO(tsv), sep='\t', quoting=csv.QUOTE_NONE,
+                dtype={'text': str}, keep_default_na=False
+            )
             
             # Group text by lines and positions
             table_data = self._group_text_into_table(ocr_data)
@@ -450,48 +825,33 @@ class EnhancedTableOCRService:
             logger.error(f"Error in fallback OCR extraction: {e}")
             return pd.DataFrame()
     
-    def _group_text_into_table(self, ocr_data: Dict) -> List[List[str]]:
+    def _group_text_into_table(self, ocr_data: pd.DataFrame) -> List[List[str]]:
         """
         Group OCR text data into table structure using clustering
         
         Args:
-            ocr_data: OCR data from pytesseract
+            ocr_data: Word boxes from pytesseract's image_to_data, one row per box
             
         Returns:
             2D list representing table structure
         """
         # Filter out low confidence text
-        filtered_data = []
-        for i in range(len(ocr_data['text'])):
-            if int(ocr_data['conf'][i]) > 30 and ocr_data['text'][i].strip():
-                filtered_data.append({
-                    'text': ocr_data['text'][i].strip(),
-                    'left': ocr_data['left'][i],
-                    'top': ocr_data['top'][i],
-                    'width': ocr_data['width'][i],
-                    'height': ocr_data['height'][i]
-                })
-        
-        if not filtered_data:
+        texts = ocr_data['text'].str.strip()
+        keep = (ocr_data['conf'] > 30) & (texts != '')
+        if not keep.any():
             return []
         
-        # Use clustering for row detection
-        positions = np.array([[item['top']] for item in filtered_data])
-        clustering = DBSCAN(eps=15, min_samples=1).fit(positions)
-        labels = clustering.labels_
-        
-        # Group by cluster labels (rows)
-        rows = {}
-        for i, label in enumerate(labels):
-            if label not in rows:
-                rows[label] = []
-            rows[label].append(filtered_data[i])
+        words = pd.DataFrame({
+            'text': texts[keep],
+            'left': ocr_data['left'][keep],
+            'top': ocr_data['top'][keep]
+        })
         
-        # Sort rows and cells within rows
+        # Split the top positions into rows, top to bottom, and sort cells within rows
         sorted_rows = []
-        for label in sorted(rows.keys(), key=lambda l: np.mean([item['top'] for item in rows[l]])):
-            row_items = sorted(rows[label], key=lambda x: x['left'])
-            sorted_rows.append([item['text'] for item in row_items])
+        for group in _split_by_gaps(words['top'].to_numpy(), 15):
+            row_items = words.iloc[group].sort_values('left', kind='stable')
+            sorted_rows.append(row_items['text'].tolist())
         
         return sorted_rows
     
@@ -554,39 +914,49 @@ class EnhancedTableOCRService:
         # Try to identify subject and grade columns
         columns = df.columns.tolist()
         
-        # Look for common patterns in Vietnamese grade tables
-        subject_col = None
-        grade_cols = []
+        # Look for common patterns in Vietnamese grade tables.
+        # Columns are tracked by position: a header row promoted from OCR
+        # may repeat a label (e.g. several empty cells), and df[label] would
+        # then return a DataFrame instead of a column
+        subject_pos = None
+        grade_positions = []
         
-        for col in columns:
+        for pos, col in enumerate(columns):
             col_lower = str(col).lower()
             if any(keyword in col_lower for keyword in ['môn', 'subject', 'tên môn']):
-                subject_col = col
+                subject_pos = pos
             elif any(keyword in col_lower for keyword in ['hk1', 'hk2', 'học kỳ', 'semester', 'điểm', 'grade', 'final', 'cuối kỳ']):
-                grade_cols.append(col)
+                grade_positions.append(pos)
         
         # If no specific columns found, use first column as subject and rest as grades
-        if subject_col is None and len(columns) > 0:
-            subject_col = columns[0]
-            grade_cols = columns[1:]
+        if subject_pos is None and len(columns) > 0:
+            subject_pos = 0
+            grade_positions = list(range(1, len(columns)))
+        
+        if subject_pos is None or not columns[subject_pos]:
+            return result
+        
+        grade_cols = [columns[pos] for pos in grade_positions]
+        
+        # Clean and parse each column once; Vietnamese grades may use a decimal comma
+        subjects = df.iloc[:, subject_pos].astype(str).str.strip()
+        grade_texts = [df.iloc[:, pos].astype(str).str.strip() for pos in grade_positions]
+        grade_numbers = [
+            pd.to_numeric(text.str.replace(',', '.', regex=False), errors='coerce').tolist()
+            for text in grade_texts
+        ]
+        grade_texts = [text.tolist() for text in grade_texts]
         
-        # Process each row
-        for _, row in df.iterrows():
-            if subject_col and str(row[subject_col]).strip():
+        # Process each row, keeping the original text where a grade is not a number
+        for i, subject in enumerate(subjects.tolist()):
+            if subject:
                 grade_entry = {
-                    "subject": str(row[subject_col]).strip()
+                    "subject": subject
                 }
                 
-                # Add grades
-                for grade_col in grade_cols:
-                    grade_value = str(row[grade_col]).strip()
-                    if grade_value and self._is_numeric(grade_value):
-                        try:
-                            grade_entry[grade_col] = float(grade_value.replace(',', '.'))
-                        except ValueError:
-                            grade_entry[grade_col] = grade_value
-                    else:
-                        grade_entry[grade_col] = grade_value
+                for grade_col, texts, numbers in zip(grade_cols, grade_texts, grade_numbers):
+                    number = numbers[i]
+                    grade_entry[grade_col] = texts[i] if pd.isna(number) else float(number)
                 
                 result["grades"].append(grade_entry)
         
@@ -607,6 +977,7 @@ class EnhancedTableOCRService:
         try:
             grades_data = self.format_as_student_grades(df, metadata)
             
+            # json.dump writes the encoder's pieces as they are produced, never the whole document
             with open(file_path, 'w', encoding='utf-8') as f:
                 json.dump(grades_data, f, ensure_ascii=False, indent=2)
             
@@ -628,7 +999,8 @@ class EnhancedTableOCRService:
             True if successful, False otherwise
         """
         try:
-            df.to_csv(file_path, index=False, encoding='utf-8-sig')
+            # Format and write 1000 rows at a time instead of pandas' default of 100000 cells
+            df.to_csv(file_path, index=False, encoding='utf-8-sig', chunksize=1000)
             logger.info(f"Successfully exported to CSV: {file_path}")
             return True
         except Exception as e:
@@ -1,37 +1,68 @@
 # File Service - Handles file opening, saving, and validation for the OCR application.
+import logging
 import os
-from typing import Optional
-from PySide6.QtWidgets import QFileDialog, QWidget
+import stat
+from typing import TYPE_CHECKING, List, Optional
 from src.services.log_service import get_logger
 
+# Qt widgets are imported inside the dialog methods, so validation works without loading them
+if TYPE_CHECKING:
+    from PySide6.QtWidgets import QWidget
+
 # Initialize logger for this module
+# Error tracebacks are only logged when the logger is at DEBUG level
 logger = get_logger(__name__)
 
 # Define valid image extensions as a constant
 VALID_IMAGE_EXTENSIONS: tuple[str, ...] = ('.png', '.jpg', '.jpeg', '.bmp', '.tiff')
 
+# File dialog filters, built once from the constants above
+_IMAGE_DIALOG_FILTER = f"Images (*{' *'.join(VALID_IMAGE_EXTENSIONS)});;All Files (*)"
+_TEXT_DIALOG_FILTER = "Text Files (*.txt);;All Files (*)"
+_CSV_DIALOG_FILTER = "CSV Files (*.csv);;All Files (*)"
+_JSON_DIALOG_FILTER = "JSON Files (*.json);;All Files (*)"
+_EXCEL_DIALOG_FILTER = "Excel Files (*.xlsx);;All Files (*)"
+
 
 class FileService:
     # A service class dedicated to handling all file-related operations.
 
     @staticmethod
-    def select_image_file(parent_widget: Optional[QWidget] = None) -> Optional[str]:
+    def select_image_file(parent_widget: Optional['QWidget'] = None) -> Optional[str]:
         # Opens a file dialog for the user to select an image file.
+        from PySide6.QtWidgets import QFileDialog
         file_path, _ = QFileDialog.getOpenFileName(
             parent_widget,
             "Select Image",
             "",
-            f"Images (*{' *'.join(VALID_IMAGE_EXTENSIONS)});;All Files (*)"
+            _IMAGE_DIALOG_FILTER
         )
         if file_path:
-            logger.info(f"User selected image file: {file_path}")
+            logger.info("User selected image file: %s", file_path)
             return file_path
         logger.info("File selection was cancelled by the user.")
         return None
 
     @staticmethod
-    def save_text_to_file(text_content: str, parent_widget: Optional[QWidget] = None) -> Optional[str]:
+    def select_image_files(parent_widget: Optional['QWidget'] = None) -> List[str]:
+        # Opens a file dialog for the user to select several image files at once.
+        from PySide6.QtWidgets import QFileDialog
+        file_paths, _ = QFileDialog.getOpenFileNames(
+            parent_widget,
+            "Select Images",
+            "",
+            _IMAGE_DIALOG_FILTER
+        )
+        if file_paths:
+            logger.info("User selected %d image files.", len(file_paths))
+        else:
+            logger.info("File selection was cancelled by the user.")
+        return file_paths
+
+    @staticmethod
+    def save_text_to_file(text_content: str, parent_widget: Optional['QWidget'] = None) -> Optional[str]:
         # Saves the given text content to a file chosen by the user.
+        from PySide6.QtWidgets import QFileDialog
         if not text_content:
             logger.warning("Attempted to save empty text content.")
             return None
@@ -40,62 +71,65 @@ class FileService:
             parent_widget,
             "Save Text",
             "",
-            "Text Files (*.txt);;All Files (*)"
+            _TEXT_DIALOG_FILTER
         )
 
         if file_path:
             try:
                 with open(file_path, 'w', encoding='utf-8') as f:
                     f.write(text_content)
-                logger.info(f"Text content successfully saved to: {file_path}")
+                logger.info("Text content successfully saved to: %s", file_path)
                 return file_path
             except IOError as e:
-                logger.error(f"An IOError occurred while saving file to {file_path}: {e}", exc_info=True)
+                logger.error("An IOError occurred while saving file to %s: %s", file_path, e, exc_info=logger.isEnabledFor(logging.DEBUG))
                 return None
         logger.info("File save operation was cancelled by the user.")
         return None
 
     @staticmethod
-    def save_csv_file(parent_widget: Optional[QWidget] = None) -> Optional[str]:
+    def save_csv_file(parent_widget: Optional['QWidget'] = None) -> Optional[str]:
         """Opens a file dialog for saving CSV files."""
+        from PySide6.QtWidgets import QFileDialog
         file_path, _ = QFileDialog.getSaveFileName(
             parent_widget,
             "Export CSV",
             "",
-            "CSV Files (*.csv);;All Files (*)"
+            _CSV_DIALOG_FILTER
         )
         if file_path:
-            logger.info(f"User selected CSV export path: {file_path}")
+            logger.info("User selected CSV export path: %s", file_path)
             return file_path
         logger.info("CSV export was cancelled by the user.")
         return None
 
     @staticmethod
-    def save_json_file(parent_widget: Optional[QWidget] = None) -> Optional[str]:
+    def save_json_file(parent_widget: Optional['QWidget'] = None) -> Optional[str]:
         """Opens a file dialog for saving JSON files."""
+        from PySide6.QtWidgets import QFileDialog
         file_path, _ = QFileDialog.getSaveFileName(
             parent_widget,
             "Export JSON",
             "",
-            "JSON Files (*.json);;All Files (*)"
+            _JSON_DIALOG_FILTER
         )
         if file_path:
-            logger.info(f"User selected JSON export path: {file_path}")
+            logger.info("User selected JSON export path: %s", file_path)
             return file_path
         logger.info("JSON export was cancelled by the user.")
         return None
 
     @staticmethod
-    def save_excel_file(parent_widget: Optional[QWidget] = None) -> Optional[str]:
+    def save_excel_file(parent_widget: Optional['QWidget'] = None) -> Optional[str]:
         """Opens a file dialog for saving Excel files."""
+        from PySide6.QtWidgets import QFileDialog
         file_path, _ = QFileDialog.getSaveFileName(
             parent_widget,
             "Export Excel",
             "",
-            "Excel Files (*.xlsx);;All Files (*)"
+            _EXCEL_DIALOG_FILTER
         )
         if file_path:
-            logger.info(f"User selected Excel export path: {file_path}")
+            logger.info("User selected Excel export path: %s", file_path)
             return file_path
         logger.info("Excel export was cancelled by the user.")
         return None
@@ -103,12 +137,20 @@ class FileService:
     @staticmethod
     def is_valid_image(file_path: str) -> bool:
         # Validates if a given file path points to a valid and existing image file.
-        if not os.path.exists(file_path):
-            logger.warning(f"Validation failed: File does not exist at path: {file_path}")
+        # The extension is checked first, so unsupported files never touch the file system.
+        # The extensions are lowercase, so one endswith call checks them all.
+        if not file_path.lower().endswith(VALID_IMAGE_EXTENSIONS):
+            _, ext = os.path.splitext(file_path)
+            logger.warning("Validation failed: File with extension '%s' is not a supported image type.", ext)
+            return False
+
+        # A single stat tells both whether the path exists and whether it is a regular file
+        try:
+            mode = os.stat(file_path).st_mode
+        except OSError:
+            logger.warning("Validation failed: File does not exist at path: %s", file_path)
+            return False
+        if not stat.S_ISREG(mode):
+            logger.warning("Validation failed: Path is not a regular file: %s", file_path)
             return False
-        
-        _, ext = os.path.splitext(file_path)
-        is_valid = ext.lower() in VALID_IMAGE_EXTENSIONS
-        if not is_valid:
-            logger.warning(f"Validation failed: File with extension '{ext}' is not a supported image type.")
-        return is_valid
+        return True
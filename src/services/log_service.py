@@ -1,17 +1,74 @@
 # Logging Service - Centralized logging configuration for the OCR application.
 import logging
-from typing import Final
+import logging.handlers
+import sys
+import time
+from typing import Final, Optional, TextIO, Tuple
 
 # Define a constant for the log format to ensure consistency
 LOG_FORMAT: Final[str] = '%(asctime)s - %(levelname)s - [%(name)s] - %(message)s'
+LOG_DATE_FORMAT: Final[str] = '%Y-%m-%d %H:%M:%S'
+
+# Records buffered before they are written out together
+LOG_BUFFER_CAPACITY: Final[int] = 512
+
+
+class CachedTimeFormatter(logging.Formatter):
+    # Formats asctime once per second instead of once per record.
+    # The date format has no sub-second fields, so every record within the same second shares the string.
+
+    def __init__(self, fmt: Optional[str] = None, datefmt: Optional[str] = None) -> None:
+        # Initializes the formatter with an empty timestamp cache.
+        super().__init__(fmt, datefmt)
+        # (second, datefmt, formatted) kept as one tuple so concurrent readers never see a torn pair
+        self._cached_time: Tuple[int, Optional[str], str] = (-1, None, '')
+
+    def formatTime(self, record: logging.LogRecord, datefmt: Optional[str] = None) -> str:
+        # Reuses the formatted timestamp while the record's second and format are unchanged.
+        if not datefmt:
+            return super().formatTime(record, datefmt)
+        second = int(record.created)
+        cached_second, cached_datefmt, formatted = self._cached_time
+        if second != cached_second or datefmt != cached_datefmt:
+            formatted = time.strftime(datefmt, self.converter(second))
+            self._cached_time = (second, datefmt, formatted)
+        return formatted
+
+
+class BatchedStreamHandler(logging.handlers.BufferingHandler):
+    # Buffers formatted records and writes them to the stream with a single write call.
+    # A record at flush_level or above flushes the buffer at once, so warnings are never held back.
+
+    def __init__(self, capacity: int, flush_level: int = logging.WARNING, stream: Optional[TextIO] = None) -> None:
+        # Initializes the handler; the stream defaults to stderr.
+        super().__init__(capacity)
+        self.flush_level = flush_level
+        self.stream = stream if stream is not None else sys.stderr
+
+    def shouldFlush(self, record: logging.LogRecord) -> bool:
+        # Flushes when the buffer is full or the record is important enough.
+        return super().shouldFlush(record) or record.levelno >= self.flush_level
+
+    def flush(self) -> None:
+        # Writes all buffered records in one go.
+        with self.lock:
+            if not self.buffer:
+                return
+            try:
+                self.stream.write(''.join(self.format(record) + '\n' for record in self.buffer))
+                self.stream.flush()
+            except Exception:
+                self.handleError(self.buffer[-1])
+            finally:
+                self.buffer.clear()
+
 
 def setup_logging() -> None:
     # Configures the root logger for the application.
-    logging.basicConfig(
-        level=logging.INFO,
-        format=LOG_FORMAT,
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
+    # Logging's exit handler flushes whatever is still buffered when the application quits.
+    handler = BatchedStreamHandler(LOG_BUFFER_CAPACITY)
+    handler.setFormatter(CachedTimeFormatter(LOG_FORMAT, datefmt=LOG_DATE_FORMAT))
+    logging.basicConfig(level=logging.INFO, handlers=[handler])
 
 def get_logger(name: str) -> logging.Logger:
     # Retrieves a logger instance for a given module name.
@@ -1,80 +1,339 @@
 # OCR Service - Manages OCR model initialization and text extraction processes.
-from typing import Callable, Optional, List
-from PySide6.QtCore import QObject, QThread, Signal
-from src.model.ocr_model import OCRModel
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict, deque
+from typing import TYPE_CHECKING, Callable, Deque, Optional, List, Tuple, Union
+import numpy as np
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal
 from src.services.log_service import get_logger
 
+if TYPE_CHECKING:
+    from src.model.ocr_model import OCRModel
+
+# Extracted texts kept for reuse, and how much of a file is hashed when its times are coarse
+RESULT_CACHE_SIZE = 32
+RESULT_HASH_BYTES = 64 * 1024
+
+# Identifies a file's contents: path, modification time, size and, for coarse times, a content hash
+ResultKey = Tuple[str, int, int, Optional[bytes]]
+
 # Initialize logger for this module
+# Error tracebacks are only logged when the logger is at DEBUG level
 logger = get_logger(__name__)
 
 
-class OCRWorker(QThread):
-    # A dedicated worker thread for running the OCR process.
+class OCRSignals(QObject):
+    # Signals emitted by an OCRTask; QRunnable itself cannot own signals.
     text_extracted = Signal(str)
+    # The extracted text together with the task's result key, for the service's cache
+    keyed_text_extracted = Signal(object, str)
+    line_extracted = Signal(str)
+    batch_extracted = Signal(list)
     error_occurred = Signal(str)
+    finished = Signal()
+
 
-    def __init__(self, model: OCRModel, image_path: str) -> None:
-        # Initializes the OCR worker.
+class OCRTask(QRunnable):
+    # A unit of OCR work executed on a pooled thread.
+
+    def __init__(
+        self,
+        model: 'OCRModel',
+        image: Union[str, np.ndarray],
+        parent: Optional[QObject] = None,
+        stream_lines: bool = False,
+        result_key: Optional[ResultKey] = None,
+        cancelled: Optional[threading.Event] = None
+    ) -> None:
+        # Initializes the OCR task with an image path or an in-memory image.
+        # With stream_lines, each recognized line is also emitted as soon as it is read.
+        # With result_key, the text is also emitted with that key so it can be cached.
+        # Once cancelled is set, the task stops as soon as it can and emits nothing more.
+        # The signals are parented so they outlive the auto-deleted runnable.
         super().__init__()
         self.model = model
-        self.image_path = image_path
+        self.image = image
+        self.stream_lines = stream_lines
+        self.result_key = result_key
+        self.cancelled = cancelled if cancelled is not None else threading.Event()
+        self.signals = OCRSignals(parent)
 
     def run(self) -> None:
-        # The main execution method of the worker thread.
+        # The main execution method, invoked by the thread pool.
+        if self.cancelled.is_set():
+            return
         try:
-            logger.info(f"Worker starting OCR extraction for: {self.image_path}")
-            text = self.model.extract_text(self.image_path)
-            self.text_extracted.emit(text)
+            source = self.image if isinstance(self.image, str) else "in-memory image"
+            logger.info("Worker starting OCR extraction for: %s", source)
+            if self.stream_lines:
+                lines = []
+                for line in self.model.iter_text_lines(self.image):
+                    # Lines are recognized one at a time, so a cancelled stream stops here
+                    if self.cancelled.is_set():
+                        return
+                    lines.append(line)
+                    self.signals.line_extracted.emit(line)
+                text = '\n'.join(lines)
+            else:
+                text = self.model.extract_text(self.image)
+            if self.cancelled.is_set():
+                return
+            if self.result_key is not None:
+                self.signals.keyed_text_extracted.emit(self.result_key, text)
+            self.signals.text_extracted.emit(text)
         except Exception as e:
-            logger.error(f"An error occurred in OCR worker: {e}", exc_info=True)
-            self.error_occurred.emit(f"Failed to process image: {e}")
+            if not self.cancelled.is_set():
+                logger.error("An error occurred in OCR worker: %s", e, exc_info=logger.isEnabledFor(logging.DEBUG))
+                self.signals.error_occurred.emit(f"Failed to process image: {e}")
+        finally:
+            if not self.cancelled.is_set():
+                self.signals.finished.emit()
+
+
+class OCRBatchTask(QRunnable):
+    # Extracts text from several images in one pooled task so the model can batch them.
+
+    def __init__(
+        self,
+        model: 'OCRModel',
+        image_paths: List[str],
+        parent: Optional[QObject] = None,
+        cancelled: Optional[threading.Event] = None
+    ) -> None:
+        # Initializes the batch task. The signals are parented so they outlive the auto-deleted runnable.
+        # Once cancelled is set, the task emits nothing more.
+        super().__init__()
+        self.model = model
+        self.image_paths = image_paths
+        self.cancelled = cancelled if cancelled is not None else threading.Event()
+        self.signals = OCRSignals(parent)
+
+    def run(self) -> None:
+        # The main execution method, invoked by the thread pool.
+        if self.cancelled.is_set():
+            return
+        try:
+            logger.info("Worker starting batch OCR extraction for %d images", len(self.image_paths))
+            texts = self.model.batch_extract(self.image_paths)
+            if not self.cancelled.is_set():
+                self.signals.batch_extracted.emit(texts)
+        except Exception as e:
+            if not self.cancelled.is_set():
+                logger.error("An error occurred in batch OCR worker: %s", e, exc_info=logger.isEnabledFor(logging.DEBUG))
+                self.signals.error_occurred.emit(f"Failed to process images: {e}")
+        finally:
+            if not self.cancelled.is_set():
+                self.signals.finished.emit()
+
+
+class OCRModelLoadTask(QRunnable):
+    # Loads the service's OCR model on a pooled thread so the GUI thread is not blocked.
+
+    def __init__(self, service: 'OCRService', languages: List[str]) -> None:
+        # Initializes the task with the service to load the model for.
+        super().__init__()
+        self.service = service
+        self.languages = languages
+
+    def run(self) -> None:
+        # The main execution method, invoked by the thread pool.
+        self.service.model = self.service._initialize_model(self.languages)
+        self.service.model_ready.emit()
+
+
+class OCRWarmupTask(QRunnable):
+    # Runs the service's warmup inference on a pooled thread.
+
+    def __init__(self, service: 'OCRService') -> None:
+        # Initializes the task with the service to warm up.
+        super().__init__()
+        self.service = service
+
+    def run(self) -> None:
+        # The main execution method, invoked by the thread pool.
+        self.service.warmup()
 
 
 class OCRService(QObject):
     # A service class for managing the OCR model and extraction process.
-    def __init__(self, languages: Optional[List[str]] = None) -> None:
+    # Emitted on the loading thread once a background model load has finished, successfully or not.
+    model_ready = Signal()
+
+    def __init__(self, languages: Optional[List[str]] = None, load_async: bool = False) -> None:
         # Initializes the OCR service and the underlying model.
+        # With load_async, the model is loaded on a pooled thread and requests made
+        # in the meantime are queued until it is ready.
         super().__init__()
         if languages is None:
             languages = ['en', 'vi']
-        self.model = self._initialize_model(languages)
-        self.worker: Optional[OCRWorker] = None
+        self._warmed = False
+        self._warmup_requested = False
+        # Set by cleanup; running tasks stop emitting and queued ones do nothing
+        self._cancelled = threading.Event()
+        # Requests waiting for the model, run in order once it is loaded
+        self._pending: Deque[Callable[[], None]] = deque()
+        # Reuse pooled threads instead of spawning a QThread per request
+        self.pool: QThreadPool = QThreadPool.globalInstance()
+        self.pool.setMaxThreadCount(max(1, (os.cpu_count() or 1) // 2))
+        self.model: Optional['OCRModel'] = None
+        self._loading = load_async
+        # Extracted text of recent image files, least recently used first
+        self._results: 'OrderedDict[ResultKey, str]' = OrderedDict()
+        if load_async:
+            self.model_ready.connect(self._on_model_ready)
+            self.pool.start(OCRModelLoadTask(self, languages))
+        else:
+            self.model = self._initialize_model(languages)
 
-    def _initialize_model(self, languages: List[str]) -> Optional[OCRModel]:
+    def _initialize_model(self, languages: List[str]) -> Optional['OCRModel']:
         # Initializes the OCR model with the specified languages.
+        # The model module pulls in EasyOCR and torch, so it is only imported here.
         try:
-            logger.info(f"Initializing OCR model with languages: {languages}")
-            model = OCRModel(languages=languages)
+            from src.model.ocr_model import get_shared_model
+            logger.info("Initializing OCR model with languages: %s", languages)
+            model = get_shared_model(languages)
             logger.info("OCR model initialized successfully.")
             return model
         except Exception as e:
-            logger.error(f"Failed to initialize OCR model: {e}", exc_info=True)
+            logger.error("Failed to initialize OCR model: %s", e, exc_info=logger.isEnabledFor(logging.DEBUG))
             return None
 
+    def warmup(self) -> None:
+        # Runs one inference on a blank image so torch initialization and the first-batch
+        # setup happen before the user's first extraction. Failures are only logged.
+        if self._warmed or not self.model:
+            return
+        self._warmed = True
+        try:
+            logger.info("Warming up the OCR reader.")
+            self.model.reader.readtext(np.zeros((64, 64, 3), dtype=np.uint8))
+            logger.info("OCR reader warmup finished.")
+        except Exception as e:
+            logger.warning("OCR reader warmup failed: %s", e)
+
+    def start_warmup(self) -> None:
+        # Starts the warmup on a pooled worker thread, once the model is loaded.
+        if self._loading:
+            self._warmup_requested = True
+            return
+        if self._warmed or not self.model:
+            return
+        self.pool.start(OCRWarmupTask(self))
+
+    def _on_model_ready(self) -> None:
+        # Runs on the service's thread after a background load: starts the queued requests.
+        self._loading = False
+        while self._pending:
+            self._pending.popleft()()
+        if self._warmup_requested:
+            self.start_warmup()
+
     def extract_text(
         self,
-        image_path: str,
+        image: Union[str, np.ndarray],
         success_callback: Callable[[str], None],
         error_callback: Callable[[str], None],
+        finished_callback: Callable[[], None],
+        line_callback: Optional[Callable[[str], None]] = None,
+        source_path: Optional[str] = None
+    ) -> None:
+        # Starts the text extraction process on a pooled worker thread.
+        # line_callback, if given, receives each line as soon as it is recognized.
+        # source_path names the file an in-memory image was read from; text from an
+        # unchanged file is returned from memory without running the model again.
+        if self._loading:
+            self._pending.append(lambda: self.extract_text(
+                image, success_callback, error_callback, finished_callback, line_callback, source_path
+            ))
+            return
+
+        if not self.model:
+            error_message = "OCR model is not initialized. Cannot extract text."
+            logger.error(error_message)
+            error_callback(error_message)
+            return
+
+        key = self._result_key(image if isinstance(image, str) else source_path)
+        if key is not None and key in self._results:
+            logger.info("Reusing extracted text for unchanged file: %s", key[0])
+            self._results.move_to_end(key)
+            success_callback(self._results[key])
+            finished_callback()
+            return
+
+        task = OCRTask(
+            self.model, image, parent=self, stream_lines=line_callback is not None, result_key=key,
+            cancelled=self._cancelled
+        )
+        if line_callback is not None:
+            task.signals.line_extracted.connect(line_callback)
+        # Delivered on the service's thread, so the cache is only touched there
+        task.signals.keyed_text_extracted.connect(self._remember_result)
+        task.signals.text_extracted.connect(success_callback)
+        task.signals.error_occurred.connect(error_callback)
+        task.signals.finished.connect(finished_callback)
+        task.signals.finished.connect(task.signals.deleteLater)
+        self.pool.start(task)
+
+    def _remember_result(self, key: ResultKey, text: str) -> None:
+        # Stores the text extracted from the file identified by key, evicting the oldest entry when full.
+        self._results[key] = text
+        self._results.move_to_end(key)
+        if len(self._results) > RESULT_CACHE_SIZE:
+            self._results.popitem(last=False)
+
+    @staticmethod
+    def _result_key(path: Optional[str]) -> Optional[ResultKey]:
+        # Identifies a file's current contents by path, modification time and size.
+        # When the file system only stores whole seconds, a rewrite within the same second
+        # keeps the same time, so a hash of the file's start is added to the key.
+        if path is None:
+            return None
+        try:
+            st = os.stat(path)
+            digest = None
+            if st.st_mtime_ns % 1_000_000_000 == 0:
+                with open(path, 'rb') as f:
+                    digest = hashlib.blake2b(f.read(RESULT_HASH_BYTES), digest_size=8).digest()
+        except OSError:
+            return None
+        return path, st.st_mtime_ns, st.st_size, digest
+
+    def extract_batch(
+        self,
+        image_paths: List[str],
+        success_callback: Callable[[List[str]], None],
+        error_callback: Callable[[str], None],
         finished_callback: Callable[[], None]
     ) -> None:
-        # Starts the text extraction process in a non-blocking worker thread.
+        # Starts text extraction for several images as one pooled task.
+        if self._loading:
+            self._pending.append(lambda: self.extract_batch(
+                image_paths, success_callback, error_callback, finished_callback
+            ))
+            return
+
         if not self.model:
             error_message = "OCR model is not initialized. Cannot extract text."
             logger.error(error_message)
             error_callback(error_message)
             return
 
-        self.worker = OCRWorker(self.model, image_path)
-        self.worker.text_extracted.connect(success_callback)
-        self.worker.error_occurred.connect(error_callback)
-        self.worker.finished.connect(finished_callback)
-        self.worker.start()
+        task = OCRBatchTask(self.model, image_paths, parent=self, cancelled=self._cancelled)
+        task.signals.batch_extracted.connect(success_callback)
+        task.signals.error_occurred.connect(error_callback)
+        task.signals.finished.connect(finished_callback)
+        task.signals.finished.connect(task.signals.deleteLater)
+        self.pool.start(task)
 
     def cleanup(self) -> None:
-        # Performs cleanup by ensuring the worker thread is properly terminated.
-        if self.worker and self.worker.isRunning():
-            logger.info("Attempting to terminate the OCR worker thread.")
-            self.worker.quit()
-            self.worker.wait()  # Wait for the thread to finish gracefully
-            logger.info("OCR worker thread terminated.")
+        # Performs cleanup by cancelling pending OCR tasks and waiting for running ones to stop.
+        # Cancelled tasks deliver no more results, so no callback reaches a closed window.
+        self._cancelled.set()
+        self._pending.clear()
+        if self.pool.activeThreadCount() > 0:
+            logger.info("Waiting for pending OCR tasks to finish.")
+            self.pool.waitForDone()
+            logger.info("All OCR tasks have finished.")
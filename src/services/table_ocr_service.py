@@ -1,33 +1,98 @@
 """
 Table OCR Service - Handles table detection, OCR processing, and data structuring
 """
+import os
+from concurrent.futures import ThreadPoolExecutor
 import cv2
 import numpy as np
 import pandas as pd
 import pytesseract
-import easyocr
 from typing import List, Dict, Tuple, Optional, Any
 from PIL import Image
 import re
+from src.model.ocr_model import BATCHED_READ_SIZE
 from src.services.log_service import get_logger
 
 logger = get_logger(__name__)
 
+# Most pages extract_tables_batch preprocesses and reads with Tesseract at the same time
+MAX_PAGE_WORKERS = 4
+
+# Metadata fields and the patterns tried for each, in order, compiled once
+_METADATA_PATTERNS: Tuple[Tuple[str, Tuple['re.Pattern[str]', ...]], ...] = tuple(
+    (key, tuple(re.compile(pattern, re.IGNORECASE) for pattern in pattern_list))
+    for key, pattern_list in (
+        ('student_name', (
+            r'(?:Tên|Họ tên|Name)[\s:]*([^\n\r]+)',
+            r'(?:Học sinh|Student)[\s:]*([^\n\r]+)'
+        )),
+        ('class', (
+            r'(?:Lớp|Class)[\s:]*([^\n\r]+)',
+            r'(?:Khối|Grade)[\s:]*([^\n\r]+)'
+        )),
+        ('school', (
+            r'(?:Trường|School)[\s:]*([^\n\r]+)',
+        )),
+        ('subject', (
+            r'(?:Môn|Subject)[\s:]*([^\n\r]+)',
+        )),
+        ('semester', (
+            r'(?:Học kỳ|Semester)[\s:]*([^\n\r]+)',
+        )),
+        ('year', (
+            r'(?:Năm học|Academic year)[\s:]*([^\n\r]+)',
+        )),
+    )
+)
+
 
 class TableOCRService:
     """Service for detecting and processing tables in images"""
     
+    # Sharpening kernel, built once; float32 is what filter2D works with for 8-bit images
+    _SHARPEN_KERNEL = np.array([[-1, -1, -1],
+                                [-1,  9, -1],
+                                [-1, -1, -1]], dtype=np.float32)
+    _SHARPEN_KERNEL.setflags(write=False)
+    
+    # Structuring elements for cleanup and line detection, built once
+    _CLEANUP_KERNEL = cv2.getStructuringElement(cv2.MORPH_RECT, (3, 3))
+    _HORIZONTAL_LINE_KERNEL = cv2.getStructuringElement(cv2.MORPH_RECT, (40, 1))
+    _VERTICAL_LINE_KERNEL = cv2.getStructuringElement(cv2.MORPH_RECT, (1, 40))
+    _CLEANUP_KERNEL.setflags(write=False)
+    _HORIZONTAL_LINE_KERNEL.setflags(write=False)
+    _VERTICAL_LINE_KERNEL.setflags(write=False)
+    
     def __init__(self):
         """Initialize the table OCR service"""
         self.confidence_threshold = 0.5
         self.min_table_area = 1000
         self.easyocr_reader = None
+        # Checked once; without Tesseract every table and metadata read goes to EasyOCR
+        self._have_tesseract = self._detect_tesseract()
         self._initialize_easyocr()
     
+    @staticmethod
+    def _detect_tesseract() -> bool:
+        """
+        Check whether the Tesseract binary can be run
+        
+        Returns:
+            True if Tesseract is installed and reports its version
+        """
+        try:
+            pytesseract.get_tesseract_version()
+            return True
+        except Exception as e:
+            logger.warning(f"Tesseract not available, tables will be read with EasyOCR: {e}")
+            return False
+    
     def _initialize_easyocr(self):
         """Initialize EasyOCR reader as fallback"""
         try:
-            self.easyocr_reader = easyocr.Reader(['en', 'vi'])
+            # Reuse the process-wide model so the weights are only loaded once
+            from src.model.ocr_model import get_shared_model
+            self.easyocr_reader = get_shared_model(['en', 'vi']).reader
             logger.info("EasyOCR reader initialized successfully")
         except Exception as e:
             logger.warning(f"Failed to initialize EasyOCR reader: {e}")
@@ -43,11 +108,16 @@ class TableOCRService:
         Returns:
             Preprocessed image optimized for table detection
         """
-        # Convert to grayscale if needed
+        # Keep the whole filter chain on the OpenCL device when the T-API is enabled;
+        # the intermediate images then never travel through host memory
+        use_opencl = cv2.ocl.useOpenCL()
+        source = cv2.UMat(image) if use_opencl else image
+        
+        # Convert to grayscale if needed; no filter below writes into its input, so no copy is made
         if len(image.shape) == 3:
-            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+            gray = cv2.cvtColor(source, cv2.COLOR_BGR2GRAY)
         else:
-            gray = image.copy()
+            gray = source
             
         # Apply Gaussian blur to reduce noise
         blurred = cv2.GaussianBlur(gray, (5, 5), 0)
@@ -58,9 +128,8 @@ class TableOCRService:
         )
         
         # Morphological operations to clean up the image
-        kernel = np.ones((3, 3), np.uint8)
-        cleaned = cv2.morphologyEx(binary, cv2.MORPH_CLOSE, kernel)
-        cleaned = cv2.morphologyEx(cleaned, cv2.MORPH_OPEN, kernel)
+        cleaned = cv2.morphologyEx(binary, cv2.MORPH_CLOSE, self._CLEANUP_KERNEL)
+        cleaned = cv2.morphologyEx(cleaned, cv2.MORPH_OPEN, self._CLEANUP_KERNEL)
         
         # Deskew the image
         deskewed = self._deskew_image(cleaned)
@@ -68,20 +137,30 @@ class TableOCRService:
         # Sharpen the image
         sharpened = self._sharpen_image(deskewed)
         
-        return sharpened
+        # Download once, at the end
+        return sharpened.get() if use_opencl else sharpened
     
     def _deskew_image(self, image: np.ndarray) -> np.ndarray:
         """
         Correct skew in the image
         
         Args:
-            image: Binary image
+            image: Binary image, as an array or a cv2.UMat
             
         Returns:
-            Deskewed image
+            Deskewed image, of the same kind as the input
         """
+        # Contour analysis only runs on the CPU; the rotation stays wherever the image lives
+        host = image.get() if isinstance(image, cv2.UMat) else image
+        
+        # The angle of a large image is measured at a quarter of its size; it is
+        # unchanged by the shrink and the contour search touches 16x fewer pixels
+        search = host
+        if min(host.shape[:2]) >= 800:
+            search = cv2.resize(host, None, fx=0.25, fy=0.25, interpolation=cv2.INTER_AREA)
+        
         # Find contours
-        contours, _ = cv2.findContours(image, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        contours, _ = cv2.findContours(search, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
         
         if not contours:
             return image
@@ -93,15 +172,15 @@ class TableOCRService:
         rect = cv2.minAreaRect(largest_contour)
         angle = rect[2]
         
-        # Correct the angle
-        if angle < -45:
-            angle = -(90 + angle)
-        else:
-            angle = -angle
+        # Bring the angle into (-45, 45]; OpenCV reports it in [-90, 0) or (0, 90] depending on version
+        if angle > 45:
+            angle -= 90
+        elif angle <= -45:
+            angle += 90
             
         # Only apply rotation if angle is significant
         if abs(angle) > 0.5:
-            h, w = image.shape
+            h, w = host.shape
             center = (w // 2, h // 2)
             M = cv2.getRotationMatrix2D(center, angle, 1.0)
             rotated = cv2.warpAffine(image, M, (w, h), flags=cv2.INTER_CUBIC, borderMode=cv2.BORDER_REPLICATE)
@@ -114,15 +193,12 @@ class TableOCRService:
         Apply sharpening filter to enhance text clarity
         
         Args:
-            image: Input image
+            image: Input image, as an array or a cv2.UMat
             
         Returns:
             Sharpened image
         """
-        kernel = np.array([[-1, -1, -1],
-                          [-1,  9, -1],
-                          [-1, -1, -1]])
-        sharpened = cv2.filter2D(image, -1, kernel)
+        sharpened = cv2.filter2D(image, -1, self._SHARPEN_KERNEL)
         return sharpened
     
     def detect_table_structure(self, image: np.ndarray) -> Tuple[List[int], List[int]]:
@@ -136,12 +212,10 @@ class TableOCRService:
             Tuple of (horizontal_lines, vertical_lines) positions
         """
         # Detect horizontal lines
-        horizontal_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (40, 1))
-        horizontal_lines = cv2.morphologyEx(image, cv2.MORPH_OPEN, horizontal_kernel)
+        horizontal_lines = cv2.morphologyEx(image, cv2.MORPH_OPEN, self._HORIZONTAL_LINE_KERNEL)
         
         # Detect vertical lines
-        vertical_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (1, 40))
-        vertical_lines = cv2.morphologyEx(image, cv2.MORPH_OPEN, vertical_kernel)
+        vertical_lines = cv2.morphologyEx(image, cv2.MORPH_OPEN, self._VERTICAL_LINE_KERNEL)
         
         # Find line positions
         h_lines = self._find_line_positions(horizontal_lines, axis=0)  # horizontal
@@ -166,26 +240,14 @@ class TableOCRService:
             projection = np.sum(line_image, axis=0)
             
         # Find peaks in projection
-        lines = []
         threshold = np.max(projection) * 0.3
-        
-        for i, value in enumerate(projection):
-            if value > threshold:
-                lines.append(i)
-                
-        # Merge nearby lines
-        merged_lines = []
-        if lines:
-            current_line = lines[0]
-            for line in lines[1:]:
-                if line - current_line > 10:  # minimum distance between lines
-                    merged_lines.append(current_line)
-                    current_line = line
-                else:
-                    current_line = (current_line + line) // 2
-            merged_lines.append(current_line)
+        lines = np.flatnonzero(projection > threshold)
+        if lines.size == 0:
+            return []
             
-        return sorted(merged_lines)
+        # Merge nearby lines: runs closer than the minimum distance become one line at their center
+        runs = np.split(lines, np.flatnonzero(np.diff(lines) > 10) + 1)
+        return [int(run.mean()) for run in runs]
     
     def extract_table_data(self, image: np.ndarray) -> pd.DataFrame:
         """
@@ -198,25 +260,20 @@ class TableOCRService:
             DataFrame containing the extracted table data
         """
         try:
-            # Preprocess image
-            processed_image = self.preprocess_image_for_table(image)
-            
-            # Try to use pytesseract first, fallback to EasyOCR if not available
-            try:
-                # Use pytesseract to get detailed OCR data
-                ocr_data = pytesseract.image_to_data(
-                    processed_image, 
-                    output_type=pytesseract.Output.DICT,
-                    config='--psm 6'  # Assume uniform block of text
-                )
-                
-                # Group text by lines and positions
-                table_data = self._group_text_into_table(ocr_data)
+            if not self._have_tesseract:
+                # EasyOCR's detector reads the original image better than the binarized one
+                table_data = self._extract_table_with_easyocr(image)
+            else:
+                # Preprocess image
+                processed_image = self.preprocess_image_for_table(image)
                 
-            except Exception as tesseract_error:
-                logger.warning(f"Tesseract not available, falling back to EasyOCR: {tesseract_error}")
-                # Fallback to EasyOCR-based table extraction
-                table_data = self._extract_table_with_easyocr(processed_image)
+                # Try to use pytesseract first, fallback to EasyOCR if it fails
+                try:
+                    table_data = self._extract_table_with_tesseract(processed_image)
+                except Exception as tesseract_error:
+                    logger.warning(f"Tesseract failed, falling back to EasyOCR: {tesseract_error}")
+                    # Fallback to EasyOCR-based table extraction
+                    table_data = self._extract_table_with_easyocr(processed_image)
             
             # Convert to DataFrame
             df = self._create_dataframe_from_table_data(table_data)
@@ -229,6 +286,97 @@ class TableOCRService:
             # Return empty DataFrame on error
             return pd.DataFrame()
     
+    def extract_tables_batch(self, images: List[np.ndarray]) -> List[pd.DataFrame]:
+        """
+        Extract table data from several images, batching the EasyOCR fallback
+        
+        Pages Tesseract cannot read are recognized together: same-sized pages
+        go through readtext_batched, so EasyOCR's detector runs on one batched
+        tensor instead of once per page. Without Tesseract, the original pages
+        are read and preprocessing is skipped.
+        
+        Preprocessing and Tesseract run for several pages at once on threads;
+        OpenCV releases the GIL and Tesseract runs in its own process, so
+        threads scale without forking a process holding the EasyOCR model.
+        
+        Args:
+            images: Input images
+            
+        Returns:
+            One DataFrame per input image, empty for pages that failed
+        """
+        if not images:
+            return []
+        
+        tables: List[List[List[str]]] = [[] for _ in images]
+        # Pages waiting for EasyOCR, by size
+        fallback: Dict[Tuple[int, ...], List[Tuple[int, np.ndarray]]] = {}
+        
+        if self._have_tesseract:
+            workers = min(len(images), MAX_PAGE_WORKERS, os.cpu_count() or 1)
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='table-page') as executor:
+                for index, (table_data, leftover) in enumerate(executor.map(self._read_page_with_tesseract, images)):
+                    tables[index] = table_data
+                    if leftover is not None:
+                        fallback.setdefault(leftover.shape, []).append((index, leftover))
+        else:
+            for index, image in enumerate(images):
+                fallback.setdefault(image.shape, []).append((index, image))
+        
+        for pages in fallback.values():
+            for start in range(0, len(pages), BATCHED_READ_SIZE):
+                chunk = pages[start:start + BATCHED_READ_SIZE]
+                rows_per_page = self._extract_tables_with_easyocr([page for _, page in chunk])
+                for (index, _), rows in zip(chunk, rows_per_page):
+                    tables[index] = rows
+        
+        return [self._create_dataframe_from_table_data(table_data) for table_data in tables]
+    
+    def _read_page_with_tesseract(self, image: np.ndarray) -> Tuple[List[List[str]], Optional[np.ndarray]]:
+        """
+        Preprocess one page and read its table with Tesseract
+        
+        Args:
+            image: Input image
+            
+        Returns:
+            Tuple of (table rows, preprocessed image left for EasyOCR if Tesseract failed, else None)
+        """
+        try:
+            processed_image = self.preprocess_image_for_table(image)
+        except Exception as e:
+            logger.error(f"Error extracting table data: {e}")
+            return [], None
+        
+        try:
+            return self._extract_table_with_tesseract(processed_image), None
+        except Exception as tesseract_error:
+            logger.warning(f"Tesseract failed, falling back to EasyOCR: {tesseract_error}")
+            return [], processed_image
+    
+    def _extract_table_with_tesseract(self, image: np.ndarray) -> List[List[str]]:
+        """
+        Extract table data using Tesseract
+        
+        Args:
+            image: Preprocessed image
+            
+        Returns:
+            2D list representing table structure
+            
+        Raises:
+            Exception: If Tesseract is not available or fails
+        """
+        # Use pytesseract to get detailed OCR data
+        ocr_data = pytesseract.image_to_data(
+            image, 
+            output_type=pytesseract.Output.DICT,
+            config='--psm 6'  # Assume uniform block of text
+        )
+        
+        # Group text by lines and positions
+        return self._group_text_into_table(ocr_data)
+    
     def _group_text_into_table(self, ocr_data: Dict) -> List[List[str]]:
         """
         Group OCR text data into table structure
@@ -239,47 +387,28 @@ class TableOCRService:
         Returns:
             2D list representing table structure
         """
-        # Filter out low confidence text
-        filtered_data = []
-        for i in range(len(ocr_data['text'])):
-            if int(ocr_data['conf'][i]) > 30 and ocr_data['text'][i].strip():
-                filtered_data.append({
-                    'text': ocr_data['text'][i].strip(),
-                    'left': ocr_data['left'][i],
-                    'top': ocr_data['top'][i],
-                    'width': ocr_data['width'][i],
-                    'height': ocr_data['height'][i]
-                })
-        
-        if not filtered_data:
+        # Filter out low confidence text; conf may be an int or a float string
+        # depending on the Tesseract version, and >= 31 keeps what int(conf) > 30 kept
+        text = np.char.strip(np.asarray(ocr_data['text'], dtype=str))
+        keep = (np.asarray(ocr_data['conf'], dtype=float) >= 31) & (text != '')
+        if not keep.any():
             return []
+        text = text[keep]
+        left = np.asarray(ocr_data['left'])[keep]
+        top = np.asarray(ocr_data['top'])[keep]
         
         # Sort by vertical position (top) first, then horizontal (left)
-        filtered_data.sort(key=lambda x: (x['top'], x['left']))
+        order = np.lexsort((left, top))
         
-        # Group into rows based on vertical position
-        rows = []
-        current_row = []
-        current_top = filtered_data[0]['top']
+        # Group into rows wherever the next word starts more than the threshold lower
         row_height_threshold = 20  # pixels
+        row_breaks = np.flatnonzero(np.diff(top[order]) > row_height_threshold) + 1
         
-        for item in filtered_data:
-            if abs(item['top'] - current_top) <= row_height_threshold:
-                current_row.append(item)
-            else:
-                if current_row:
-                    # Sort current row by horizontal position
-                    current_row.sort(key=lambda x: x['left'])
-                    rows.append([item['text'] for item in current_row])
-                current_row = [item]
-                current_top = item['top']
-        
-        # Add the last row
-        if current_row:
-            current_row.sort(key=lambda x: x['left'])
-            rows.append([item['text'] for item in current_row])
-        
-        return rows
+        # Sort each row by horizontal position
+        return [
+            text[row[np.argsort(left[row], kind='stable')]].tolist()
+            for row in np.split(order, row_breaks)
+        ]
     
     def _create_dataframe_from_table_data(self, table_data: List[List[str]]) -> pd.DataFrame:
         """
@@ -361,67 +490,94 @@ class TableOCRService:
         Returns:
             2D list representing table structure
         """
+        return self._extract_tables_with_easyocr([image])[0]
+    
+    def _extract_tables_with_easyocr(self, images: List[np.ndarray]) -> List[List[List[str]]]:
+        """
+        Extract table data from same-sized images with one EasyOCR call
+        
+        Args:
+            images: Preprocessed images, all of the same size
+            
+        Returns:
+            One 2D list representing table structure per image
+        """
         if not self.easyocr_reader:
             logger.warning("EasyOCR reader not available")
-            return []
+            return [[] for _ in images]
         
         try:
             # Use EasyOCR to get text with bounding boxes
-            results = self.easyocr_reader.readtext(image)
-            
-            # Convert EasyOCR results to similar format as Tesseract
-            filtered_data = []
-            for (bbox, text, confidence) in results:
-                if confidence > 0.5 and text.strip():
-                    # Extract bounding box coordinates
-                    x_coords = [point[0] for point in bbox]
-                    y_coords = [point[1] for point in bbox]
-                    left = int(min(x_coords))
-                    top = int(min(y_coords))
-                    width = int(max(x_coords) - min(x_coords))
-                    height = int(max(y_coords) - min(y_coords))
-                    
-                    filtered_data.append({
-                        'text': text.strip(),
-                        'left': left,
-                        'top': top,
-                        'width': width,
-                        'height': height
-                    })
-            
-            if not filtered_data:
-                return []
-            
-            # Sort by vertical position (top) first, then horizontal (left)
-            filtered_data.sort(key=lambda x: (x['top'], x['left']))
-            
-            # Group into rows based on vertical position
-            rows = []
-            current_row = []
-            current_top = filtered_data[0]['top']
-            row_height_threshold = 30  # pixels - slightly larger for EasyOCR
-            
-            for item in filtered_data:
-                if abs(item['top'] - current_top) <= row_height_threshold:
-                    current_row.append(item)
-                else:
-                    if current_row:
-                        # Sort current row by horizontal position
-                        current_row.sort(key=lambda x: x['left'])
-                        rows.append([item['text'] for item in current_row])
-                    current_row = [item]
-                    current_top = item['top']
-            
-            # Add the last row
-            if current_row:
-                current_row.sort(key=lambda x: x['left'])
-                rows.append([item['text'] for item in current_row])
+            if len(images) == 1:
+                results_per_image = [self.easyocr_reader.readtext(images[0])]
+            else:
+                results_per_image = self.easyocr_reader.readtext_batched(images)
             
-            return rows
+            return [self._group_easyocr_results(results) for results in results_per_image]
             
         except Exception as e:
             logger.error(f"Error in EasyOCR table extraction: {e}")
+            return [[] for _ in images]
+    
+    def _group_easyocr_results(self, results: List[Tuple]) -> List[List[str]]:
+        """
+        Group EasyOCR results into table structure
+        
+        Args:
+            results: (bbox, text, confidence) tuples from EasyOCR
+            
+        Returns:
+            2D list representing table structure
+        """
+        # Convert EasyOCR results to similar format as Tesseract
+        filtered_data = []
+        for (bbox, text, confidence) in results:
+            if confidence > 0.5 and text.strip():
+                # Extract bounding box coordinates
+                x_coords = [point[0] for point in bbox]
+                y_coords = [point[1] for point in bbox]
+                left = int(min(x_coords))
+                top = int(min(y_coords))
+                width = int(max(x_coords) - min(x_coords))
+                height = int(max(y_coords) - min(y_coords))
+                
+                filtered_data.append({
+                    'text': text.strip(),
+                    'left': left,
+                    'top': top,
+                    'width': width,
+                    'height': height
+                })
+        
+        if not filtered_data:
             return []
+        
+        # Sort by vertical position (top) first, then horizontal (left)
+        filtered_data.sort(key=lambda x: (x['top'], x['left']))
+        
+        # Group into rows based on vertical position
+        rows = []
+        current_row = []
+        current_top = filtered_data[0]['top']
+        row_height_threshold = 30  # pixels - slightly larger for EasyOCR
+        
+        for item in filtered_data:
+            if abs(item['top'] - current_top) <= row_height_threshold:
+                current_row.append(item)
+            else:
+                if current_row:
+                    # Sort current row by horizontal position
+                    current_row.sort(key=lambda x: x['left'])
+                    rows.append([item['text'] for item in current_row])
+                current_row = [item]
+                current_top = item['top']
+        
+        # Add the last row
+        if current_row:
+            current_row.sort(key=lambda x: x['left'])
+            rows.append([item['text'] for item in current_row])
+        
+        return rows
 
     def detect_metadata(self, image: np.ndarray) -> Dict[str, Any]:
         """
@@ -437,10 +593,13 @@ class TableOCRService:
         
         try:
             # Try Tesseract first, fallback to EasyOCR
-            try:
-                text = pytesseract.image_to_string(image, lang='vie+eng')
-            except Exception as tesseract_error:
-                logger.warning(f"Tesseract not available for metadata, using EasyOCR: {tesseract_error}")
+            text = None
+            if self._have_tesseract:
+                try:
+                    text = pytesseract.image_to_string(image, lang='vie+eng')
+                except Exception as tesseract_error:
+                    logger.warning(f"Tesseract failed for metadata, using EasyOCR: {tesseract_error}")
+            if text is None:
                 if self.easyocr_reader:
                     results = self.easyocr_reader.readtext(image)
                     text = ' '.join([result[1] for result in results if result[2] > 0.5])
@@ -449,32 +608,9 @@ class TableOCRService:
                     return metadata
             
             # Look for common patterns
-            patterns = {
-                'student_name': [
-                    r'(?:Tên|Họ tên|Name)[\s:]*([^\n\r]+)',
-                    r'(?:Học sinh|Student)[\s:]*([^\n\r]+)'
-                ],
-                'class': [
-                    r'(?:Lớp|Class)[\s:]*([^\n\r]+)',
-                    r'(?:Khối|Grade)[\s:]*([^\n\r]+)'
-                ],
-                'school': [
-                    r'(?:Trường|School)[\s:]*([^\n\r]+)'
-                ],
-                'subject': [
-                    r'(?:Môn|Subject)[\s:]*([^\n\r]+)'
-                ],
-                'semester': [
-                    r'(?:Học kỳ|Semester)[\s:]*([^\n\r]+)'
-                ],
-                'year': [
-                    r'(?:Năm học|Academic year)[\s:]*([^\n\r]+)'
-                ]
-            }
-            
-            for key, pattern_list in patterns.items():
+            for key, pattern_list in _METADATA_PATTERNS:
                 for pattern in pattern_list:
-                    match = re.search(pattern, text, re.IGNORECASE)
+                    match = pattern.search(text)
                     if match:
                         metadata[key] = match.group(1).strip()
                         break
@@ -537,7 +673,8 @@ class TableOCRService:
             True if successful, False otherwise
         """
         try:
-            with pd.ExcelWriter(file_path, engine='openpyxl') as writer:
+            # XlsxWriter only writes, which makes it quicker than openpyxl for large tables
+            with pd.ExcelWriter(file_path, engine='xlsxwriter') as writer:
                 # Write main data
                 df.to_excel(writer, sheet_name='Table Data', index=False)
                 
@@ -562,4 +699,5 @@ class TableOCRService:
         Returns:
             Tab-separated string
         """
-        return df.to_csv(sep='\t', index=False)
+        # Pin the line terminator so the clipboard text is the same on every platform
+        return df.to_csv(sep='\t', index=False, lineterminator='\n')
@@ -9,7 +9,7 @@ from PySide6.QtWidgets import (
     QAbstractItemView, QGroupBox, QFormLayout
 )
 from PySide6.QtCore import Qt, Signal, QSettings
-from PySide6.QtGui import QPixmap, QIcon, QAction, QDragEnterEvent, QDropEvent, QResizeEvent
+from PySide6.QtGui import QPixmap, QIcon, QImage, QAction, QDragEnterEvent, QDropEvent, QResizeEvent
 
 # Attempt to import resource configuration, with a fallback for compatibility
 try:
@@ -19,6 +19,49 @@ except (ImportError, ModuleNotFoundError):
     VALID_IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.tiff')
 
 
+# Repository root, used to resolve bundled assets independently of the working directory
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Theme stylesheets, built once at import rather than on every theme change
+LIGHT_STYLESHEET = """
+    QLabel#ImageLabel { border: 2px dashed #aaa; }
+    QPushButton { padding: 8px; }
+"""
+DARK_STYLESHEET = """
+    QWidget {
+        background-color: #2b2b2b;
+        color: #f0f0f0;
+    }
+    QMenuBar, QMenu {
+        background-color: #3c3c3c;
+        color: #f0f0f0;
+    }
+    QMenuBar::item:selected, QMenu::item:selected {
+        background-color: #555;
+    }
+    QTextEdit, QLabel {
+        background-color: #3c3c3c;
+        color: #f0f0f0;
+        border: 1px solid #555;
+    }
+    QLabel#ImageLabel {
+        border: 2px dashed #555;
+    }
+    QPushButton {
+        background-color: #555;
+        color: #f0f0f0;
+        border: 1px solid #777;
+        padding: 8px;
+    }
+    QPushButton:hover {
+        background-color: #777;
+    }
+    QSplitter::handle {
+        background-color: #3c3c3c;
+    }
+"""
+
+
 class MainWindow(QMainWindow):
     # Main window of the OCR application, responsible for the UI.
     open_file_requested = Signal()
@@ -26,6 +69,7 @@ class MainWindow(QMainWindow):
     image_selected = Signal(str)
     extract_text_requested = Signal()
     extract_table_requested = Signal()
+    extract_batch_requested = Signal()
     clear_text_requested = Signal()
     copy_text_requested = Signal()
     copy_table_requested = Signal()
@@ -192,6 +236,11 @@ class MainWindow(QMainWindow):
         open_action.triggered.connect(self.open_file_requested.emit)
         file_menu.addAction(open_action)
 
+        batch_action = QAction(text="Extract Text from Images...", parent=self)
+        batch_action.setShortcut("Ctrl+Shift+E")
+        batch_action.triggered.connect(self.extract_batch_requested.emit)
+        file_menu.addAction(batch_action)
+
         save_icon = get_icon("save") if get_icon else None
         save_action = QAction(icon=save_icon, text="Save", parent=self)
         save_action.setShortcut("Ctrl+S")
@@ -236,7 +285,7 @@ class MainWindow(QMainWindow):
         if get_icon:
             self.setWindowIcon(get_icon("favicon.ico"))
         else:
-            icon_path = os.path.join("resources", "assets", "ui", "favicon.ico")
+            icon_path = os.path.join(PROJECT_ROOT, "resources", "assets", "ui", "favicon.ico")
             if os.path.exists(icon_path):
                 self.setWindowIcon(QIcon(icon_path))
 
@@ -251,6 +300,15 @@ class MainWindow(QMainWindow):
         else:
             self.update_image_display()
 
+    def set_image_array(self, image, source: str) -> None:
+        # Displays an in-memory BGR image (e.g. a webcam frame) without writing it to disk.
+        height, width = image.shape[:2]
+        qimage = QImage(image.data, width, height, image.strides[0], QImage.Format_BGR888)
+        self.image_path = source
+        # fromImage copies the pixels, so the pixmap does not depend on the array's lifetime
+        self.original_pixmap = QPixmap.fromImage(qimage)
+        self.update_image_display()
+
     def update_image_display(self) -> None:
         # Scales the currently loaded pixmap to fit the image label.
         if self.original_pixmap:
@@ -279,6 +337,10 @@ class MainWindow(QMainWindow):
         self.text_edit.setText(text)
         self.btn_copy_text.setText("Copy")
 
+    def append_extracted_text(self, line: str) -> None:
+        # Appends one line of extracted text as it arrives from the OCR worker.
+        self.text_edit.append(line)
+
     def clear_text(self) -> None:
         # Clears the content of the text edit area.
         self.text_edit.clear()
@@ -343,47 +405,10 @@ class MainWindow(QMainWindow):
 
     def apply_theme(self) -> None:
         # Applies the currently selected theme (light or dark) to the application.
-        light_stylesheet = """
-            QLabel#ImageLabel { border: 2px dashed #aaa; }
-            QPushButton { padding: 8px; }
-        """
-        dark_stylesheet = """
-            QWidget {
-                background-color: #2b2b2b;
-                color: #f0f0f0;
-            }
-            QMenuBar, QMenu {
-                background-color: #3c3c3c;
-                color: #f0f0f0;
-            }
-            QMenuBar::item:selected, QMenu::item:selected {
-                background-color: #555;
-            }
-            QTextEdit, QLabel {
-                background-color: #3c3c3c;
-                color: #f0f0f0;
-                border: 1px solid #555;
-            }
-            QLabel#ImageLabel {
-                border: 2px dashed #555;
-            }
-            QPushButton {
-                background-color: #555;
-                color: #f0f0f0;
-                border: 1px solid #777;
-                padding: 8px;
-            }
-            QPushButton:hover {
-                background-color: #777;
-            }
-            QSplitter::handle {
-                background-color: #3c3c3c;
-            }
-        """
         if self.is_dark_mode:
-            self.setStyleSheet(dark_stylesheet)
+            self.setStyleSheet(DARK_STYLESHEET)
         else:
-            self.setStyleSheet(light_stylesheet)
+            self.setStyleSheet(LIGHT_STYLESHEET)
         
         self.image_label.setObjectName("ImageLabel")
         self.theme_action.setChecked(self.is_dark_mode)
@@ -0,0 +1,53 @@
+"""
+End-to-end test of the enhanced table OCR demo's per-image pipeline.
+"""
+from unittest.mock import patch
+
+import cv2
+import numpy as np
+import pandas as pd
+import pytest
+
+import demo_enhanced_table_ocr as demo
+from src.services.enhanced_table_ocr_service import EnhancedTableOCRService
+
+
+def fill_cells(self, image, cells):
+    """Stand in for OCR: a header row of subject names, then one score per cell."""
+    headers = ["Name", "Score"]
+    return [
+        dict(cell, text=headers[cell['col']] if cell['row'] == 0 else f"{cell['row']}.{cell['col']}")
+        for cell in cells
+    ]
+
+
+@pytest.fixture
+def grid_image(tmp_path):
+    """Fixture for a 3 x 2 ruled table saved as an image file."""
+    image = np.full((400, 600), 255, np.uint8)
+    for y in range(50, 351, 100):
+        cv2.line(image, (50, y), (550, y), 0, 3)
+    for x in range(50, 551, 250):
+        cv2.line(image, (x, 50), (x, 350), 0, 3)
+    path = tmp_path / "grid.png"
+    cv2.imwrite(str(path), image)
+    return path
+
+
+class TestProcessOne:
+    """Test cases for demo_enhanced_table_ocr.process_one."""
+
+    def test_table_exported_in_every_format(self, grid_image, tmp_path):
+        """Test that a detected table is written as CSV, Excel with metadata, and grades JSON."""
+        with patch.object(EnhancedTableOCRService, '_initialize_easyocr'), \
+             patch.object(EnhancedTableOCRService, 'extract_text_from_cells', fill_cells), \
+             patch.object(demo, '_service', None), \
+             patch.object(demo, '_io_executor', None):
+            result = demo.process_one(grid_image, tmp_path)
+
+        assert result['cells'] == 6
+        for suffix in ("_table.csv", "_table.xlsx", "_grades.json", "_preprocessed.png", "_lines.png", "_cells.png"):
+            assert str(tmp_path / f"grid{suffix}") in result['outputs']
+
+        metadata = pd.read_excel(tmp_path / "grid_table.xlsx", sheet_name='Metadata')
+        assert dict(zip(metadata['Field'], metadata['Value']))['rows_detected'] == 3
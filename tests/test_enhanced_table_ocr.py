@@ -9,11 +9,13 @@ import tempfile
 import os
 from pathlib import Path
 import sys
+from unittest.mock import MagicMock, patch
 
 # Add src to path
 sys.path.append(str(Path(__file__).parent.parent / 'src'))
 
-from src.services.enhanced_table_ocr_service import EnhancedTableOCRService
+from src.services import enhanced_table_ocr_service as enhanced_module
+from src.services.enhanced_table_ocr_service import EnhancedTableOCRService, _split_by_gaps
 
 
 class TestEnhancedTableOCRService(unittest.TestCase):
@@ -80,6 +82,30 @@ class TestEnhancedTableOCRService(unittest.TestCase):
         gray_input = cv2.cvtColor(test_image, cv2.COLOR_BGR2GRAY)
         self.assertFalse(np.array_equal(processed, gray_input))
     
+    def test_preprocess_skips_binary_input(self):
+        """Test that an already preprocessed image is not blurred and thresholded again"""
+        processed = self.service.enhanced_preprocess_image(self.create_test_image())
+        
+        with patch('src.services.enhanced_table_ocr_service.cv2.adaptiveThreshold') as mock_threshold:
+            again = self.service.enhanced_preprocess_image(processed)
+        
+        mock_threshold.assert_not_called()
+        self.assertIs(again, processed)
+    
+    def test_preprocess_caches_by_content(self):
+        """Test that the same pixels are preprocessed once, and changed pixels again"""
+        test_image = self.create_test_image()
+        processed = self.service.enhanced_preprocess_image(test_image)
+        
+        with patch('src.services.enhanced_table_ocr_service.cv2.adaptiveThreshold') as mock_threshold:
+            again = self.service.enhanced_preprocess_image(test_image.copy())
+        mock_threshold.assert_not_called()
+        self.assertIs(again, processed)
+        self.assertFalse(processed.flags.writeable)
+        
+        test_image[0, 0] = 0
+        self.assertIsNot(self.service.enhanced_preprocess_image(test_image), processed)
+    
     def test_detect_lines_with_hough(self):
         """Test line detection using HoughLines"""
         # Create test image
@@ -102,6 +128,61 @@ class TestEnhancedTableOCRService(unittest.TestCase):
             self.assertEqual(len(line), 4)  # x1, y1, x2, y2
             self.assertIsInstance(line[0], (int, np.integer))
     
+    def test_deskew_straightens_rotated_frame(self):
+        """Test that a slightly rotated table frame is rotated back"""
+        frame = np.zeros((600, 800), dtype=np.uint8)
+        cv2.rectangle(frame, (100, 100), (700, 500), 255, 3)
+        rotation = cv2.getRotationMatrix2D((400, 300), 5, 1.0)
+        skewed = cv2.warpAffine(frame, rotation, (800, 600), flags=cv2.INTER_NEAREST)
+        
+        deskewed = self.service._deskew_image(skewed)
+        
+        # The top edge is horizontal again: its ink sits in a few rows only
+        top_edge_rows = np.flatnonzero(deskewed[:200, 300:500].max(axis=1) > 127)
+        self.assertLessEqual(top_edge_rows.max() - top_edge_rows.min(), 6)
+    
+    def test_skew_estimated_on_shrunk_large_image(self):
+        """Test that the skew of a large image is measured on a quarter-size copy"""
+        frame = np.zeros((1200, 1600), dtype=np.uint8)
+        cv2.rectangle(frame, (200, 200), (1400, 1000), 255, 3)
+        rotation = cv2.getRotationMatrix2D((800, 600), -4, 1.0)
+        skewed = cv2.warpAffine(frame, rotation, (1600, 1200), flags=cv2.INTER_NEAREST)
+        
+        with patch('src.services.enhanced_table_ocr_service.cv2.resize', wraps=cv2.resize) as mock_resize:
+            angle = self.service._estimate_skew_angle(skewed)
+        
+        mock_resize.assert_called_once()
+        self.assertAlmostEqual(angle, 4, delta=0.5)
+    
+    def test_sharpen_is_identity_on_binary_images(self):
+        """Test that the sharpening kernel cannot change a 0/255 image, which preprocessing relies on"""
+        binary = (np.random.default_rng(0).random((60, 80)) > 0.5).astype(np.uint8) * 255
+        
+        np.testing.assert_array_equal(self.service._sharpen_image(binary), binary)
+    
+    def test_detected_grid_matches_drawn_table(self):
+        """Test that the drawn 4x4 ruling yields exactly the 3x3 grid of cells"""
+        test_image = self.create_test_image()
+        processed = self.service.enhanced_preprocess_image(test_image)
+        h_lines, v_lines = self.service.detect_lines_with_hough(processed)
+        
+        cells = self.service.segment_cells(processed, h_lines, v_lines)
+        
+        self.assertEqual([(cell['row'], cell['col']) for cell in cells],
+                         [(row, col) for row in range(3) for col in range(3)])
+    
+    def test_cuda_line_detection_falls_back_to_cpu(self):
+        """Test that a failing CUDA path is dropped in favour of the CPU path"""
+        processed = self.service.enhanced_preprocess_image(self.create_test_image())
+        expected = self.service.detect_lines_with_hough(processed)
+        self.service.use_gpu = True
+        
+        with patch.object(self.service, '_detect_lines_cuda', side_effect=cv2.error("no device")):
+            lines = self.service.detect_lines_with_hough(processed)
+        
+        self.assertFalse(self.service.use_gpu)
+        self.assertEqual(lines, expected)
+    
     def test_segment_cells(self):
         """Test cell segmentation"""
         # Create test image
@@ -129,6 +210,117 @@ class TestEnhancedTableOCRService(unittest.TestCase):
             bbox = cell['bbox']
             self.assertEqual(len(bbox), 4)  # left, top, width, height
     
+    def test_segment_cells_skips_thin_gaps(self):
+        """Test that grid cells are generated row by row and thin gaps are dropped"""
+        h_lines = [(0, 100, 300, 100), (0, 108, 300, 108), (0, 150, 300, 150)]
+        v_lines = [(50, 100, 50, 150), (150, 100, 150, 150), (250, 100, 250, 150)]
+        
+        cells = self.service.segment_cells(None, h_lines, v_lines)
+        
+        self.assertEqual([(cell['row'], cell['col']) for cell in cells], [(1, 0), (1, 1)])
+        self.assertEqual(cells[0]['bbox'], (50, 108, 100, 42))
+        self.assertEqual(cells[1]['right'], 250)
+    
+    def test_segment_cells_snaps_duplicate_lines(self):
+        """Test that near-duplicate Hough endpoints become a single grid line"""
+        h_lines = [(0, 102, 300, 103), (0, 105, 300, 104), (0, 150, 300, 150), (0, 200, 300, 200)]
+        v_lines = [(50, 100, 51, 200), (150, 100, 150, 200)]
+        
+        cells = self.service.segment_cells(None, h_lines, v_lines)
+        
+        self.assertEqual(len(cells), 2)
+        self.assertEqual(cells[0]['top'], 104)
+        self.assertEqual([(cell['row'], cell['col']) for cell in cells], [(0, 0), (1, 0)])
+    
+    def test_create_dataframe_from_grid(self):
+        """Test that grid cells land at their row and column, skipping segmented gaps"""
+        cells = [
+            {'row': 1, 'col': 2, 'text': '9.0'},
+            {'row': 0, 'col': 0, 'text': 'Subject'},
+            {'row': 0, 'col': 2, 'text': 'HK1'},
+            {'row': 1, 'col': 0, 'text': 'Math'},
+        ]
+        
+        df = self.service.create_dataframe_from_grid(cells)
+        
+        self.assertEqual(list(df.columns), ['Subject', 'HK1'])
+        self.assertEqual(df.values.tolist(), [['Math', '9.0']])
+    
+    def test_extract_text_from_cells_batches_easyocr(self):
+        """Test that all cells share one EasyOCR call and Tesseract only reads unsure ones"""
+        test_image = self.create_test_image()
+        cells = [
+            {'row': 0, 'col': 0, 'bbox': (52, 102, 96, 46)},
+            {'row': 0, 'col': 1, 'bbox': (152, 102, 96, 46)},
+            {'row': 0, 'col': 2, 'bbox': (252, 102, 96, 46)},
+        ]
+        reader = MagicMock()
+        # Results are returned in position order, not input order
+        reader.recognize.return_value = [
+            ([[152, 102], [248, 102], [248, 148], [152, 148]], 'HK1', 0.9),
+            ([[52, 102], [148, 102], [148, 148], [52, 148]], 'Subject', 0.8),
+            ([[252, 102], [348, 102], [348, 148], [252, 148]], 'HKZ', 0.1),
+        ]
+        self.service.easyocr_reader = reader
+        
+        with patch('src.services.enhanced_table_ocr_service.PyTessBaseAPI', None), \
+                patch('src.services.enhanced_table_ocr_service.pytesseract.image_to_string',
+                      return_value='HK2\n') as mock_tesseract:
+            result = self.service.extract_text_from_cells(test_image, cells)
+        
+        reader.recognize.assert_called_once()
+        mock_tesseract.assert_called_once()
+        self.assertEqual([cell['text'] for cell in result], ['Subject', 'HK1', 'HK2'])
+    
+    def test_tesseract_cells_read_in_parallel_keep_order(self):
+        """Test that cells read on the thread pool get their own text back"""
+        test_image = self.create_test_image()
+        cells = [{'row': 0, 'col': col, 'bbox': (52 + 100 * col, 102, 96, 46)} for col in range(3)]
+        self.service.easyocr_reader = None
+        
+        def read_cell(cell_img):
+            # Each cell is told apart by its position in the image
+            for col in range(3):
+                if np.shares_memory(cell_img, test_image[102:148, 52 + 100 * col:148 + 100 * col]):
+                    return f'cell {col}\n'
+        
+        with patch.object(self.service, '_read_cell_with_tesseract', side_effect=read_cell):
+            result = self.service.extract_text_from_cells(test_image, cells)
+        
+        self.assertEqual([cell['text'] for cell in result], ['cell 0', 'cell 1', 'cell 2'])
+    
+    def test_tesserocr_handle_reused_across_cells(self):
+        """Test that cells and service instances share one libtesseract handle per thread"""
+        enhanced_module._TESS_HANDLES.__dict__.clear()
+        test_image = self.create_test_image()
+        cells = [
+            {'row': 0, 'col': 0, 'bbox': (52, 102, 96, 46)},
+            {'row': 0, 'col': 1, 'bbox': (152, 102, 96, 46)},
+        ]
+        self.service.easyocr_reader = None
+        api_class = MagicMock()
+        api_class.return_value.GetUTF8Text.side_effect = ['Subject\n', 'HK1\n']
+        
+        with patch('src.services.enhanced_table_ocr_service.PyTessBaseAPI', api_class), \
+                patch('src.services.enhanced_table_ocr_service.PSM'), \
+                patch('src.services.enhanced_table_ocr_service.pytesseract.image_to_string') as mock_tesseract:
+            result = self.service.extract_text_from_cells(test_image, cells[:1])
+            other_service = EnhancedTableOCRService()
+            other_service.easyocr_reader = None
+            result += other_service.extract_text_from_cells(test_image, cells[1:])
+        enhanced_module._TESS_HANDLES.__dict__.clear()
+        
+        api_class.assert_called_once()
+        mock_tesseract.assert_not_called()
+        self.assertEqual([cell['text'] for cell in result], ['Subject', 'HK1'])
+    
+    def test_deskew_skips_small_images(self):
+        """Test that cell-sized crops are never rotated"""
+        cell = np.zeros((40, 120), dtype=np.uint8)
+        cv2.line(cell, (5, 5), (115, 30), 255, 3)
+        
+        self.assertIs(self.service._deskew_image(cell), cell)
+    
     def test_cluster_cells_by_position(self):
         """Test cell clustering by position"""
         # Create sample cells
@@ -156,6 +348,15 @@ class TestEnhancedTableOCRService(unittest.TestCase):
         x_coords = [cell['left'] for cell in first_row]
         self.assertEqual(x_coords, sorted(x_coords))
     
+    def test_split_by_gaps(self):
+        """Test that positions split into groups wherever neighbours are further apart than the gap"""
+        positions = np.array([150, 100, 120, 98, 140, 300])
+        
+        groups = _split_by_gaps(positions, 20)
+        
+        self.assertEqual([sorted(positions[group].tolist()) for group in groups],
+                         [[98, 100, 120, 140, 150], [300]])
+    
     def test_create_dataframe_from_clustered_cells(self):
         """Test DataFrame creation from clustered cells"""
         # Create sample clustered rows
@@ -218,6 +419,41 @@ class TestEnhancedTableOCRService(unittest.TestCase):
         self.assertEqual(first_grade['HK1'], 8.5)  # Should be converted to float
         self.assertEqual(first_grade['HK2'], 9.0)
     
+    def test_format_as_student_grades_mixed_values(self):
+        """Test that decimal commas are parsed and non-numeric grades are kept as text"""
+        df = pd.DataFrame({
+            'Subject': ['Math', ' ', 'Sport'],
+            'HK1': ['8,5', '7.0', 'Đạt'],
+            'HK2': [' 9 ', '', '90%']
+        })
+        
+        grades = self.service.format_as_student_grades(df)['grades']
+        
+        self.assertEqual(grades, [
+            {'subject': 'Math', 'HK1': 8.5, 'HK2': 9.0},
+            {'subject': 'Sport', 'HK1': 'Đạt', 'HK2': '90%'},
+        ])
+    
+    def test_format_as_student_grades_duplicate_headers(self):
+        """Test that repeated header labels, such as empty OCR cells, are read by position"""
+        df = pd.DataFrame([['Math', '8,5', 'Đạt'], ['Physics', '7', '9']], columns=['Name', '', ''])
+        
+        grades = self.service.format_as_student_grades(df)['grades']
+        
+        # The later of two same-named columns wins the entry's key
+        self.assertEqual(grades, [
+            {'subject': 'Math', '': 'Đạt'},
+            {'subject': 'Physics', '': 9.0},
+        ])
+    
+    def test_format_as_student_grades_duplicate_grade_labels(self):
+        """Test that a header repeated across grade columns does not break parsing"""
+        df = pd.DataFrame([['Math', '8', '9']], columns=['Môn học', 'Điểm', 'Điểm'])
+        
+        grades = self.service.format_as_student_grades(df)['grades']
+        
+        self.assertEqual(grades, [{'subject': 'Math', 'Điểm': 9.0}])
+    
     def test_is_numeric(self):
         """Test numeric detection"""
         # Test various numeric formats
@@ -230,6 +466,33 @@ class TestEnhancedTableOCRService(unittest.TestCase):
         self.assertFalse(self.service._is_numeric('Math'))
         self.assertFalse(self.service._is_numeric('Subject'))
         self.assertFalse(self.service._is_numeric(''))
+        # Words float() happens to accept are not grades
+        self.assertFalse(self.service._is_numeric('Nan'))
+        self.assertFalse(self.service._is_numeric('inf'))
+    
+    def test_is_header_row(self):
+        """Test that rows of mostly words are headers and rows of mostly grades are not"""
+        self.assertTrue(self.service._is_header_row(['Môn học', 'HK1', 'HK2']))
+        self.assertFalse(self.service._is_header_row(['Toán', '8,5', '9 %']))
+    
+    def test_fallback_groups_tesseract_words(self):
+        """Test that Tesseract's word boxes become rows, keeping words that look like numbers verbatim"""
+        header = 'level\tpage_num\tblock_num\tpar_num\tline_num\tword_num\tleft\ttop\twidth\theight\tconf\ttext'
+        rows = [
+            '1\t1\t0\t0\t0\t0\t0\t0\t400\t300\t-1\t',
+            '5\t1\t1\t1\t1\t1\t160\t102\t30\t12\t91\tHK1',
+            '5\t1\t1\t1\t1\t2\t60\t100\t60\t12\t95\tSubject',
+            '5\t1\t1\t1\t2\t1\t60\t150\t40\t12\t88\tNA',
+            '5\t1\t1\t1\t2\t2\t160\t152\t30\t12\t12\tnoise',
+            '5\t1\t1\t1\t2\t3\t260\t151\t30\t12\t90\t08',
+        ]
+        tsv = '\n'.join([header] + rows)
+        
+        with patch('src.services.enhanced_table_ocr_service.pytesseract.image_to_data', return_value=tsv):
+            df = self.service._fallback_ocr_extraction(np.zeros((300, 400), dtype=np.uint8))
+        
+        self.assertEqual(list(df.columns), ['Subject', 'HK1'])
+        self.assertEqual(df.values.tolist(), [['NA', '08']])
     
     def test_export_to_csv(self):
         """Test CSV export"""
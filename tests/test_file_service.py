@@ -0,0 +1,42 @@
+"""
+Unit tests for the file service's image validation.
+"""
+from unittest.mock import patch
+
+from src.services.file_service import FileService
+
+
+class TestIsValidImage:
+    """Test cases for FileService.is_valid_image."""
+
+    def test_existing_image_is_valid(self, tmp_path):
+        """Test that an existing file with an image extension is accepted, in any case."""
+        image_path = tmp_path / "scan.PNG"
+        image_path.write_bytes(b"")
+
+        assert FileService.is_valid_image(str(image_path))
+
+    def test_unsupported_extension_is_invalid(self, tmp_path):
+        """Test that an existing file with another extension is rejected."""
+        text_path = tmp_path / "notes.txt"
+        text_path.write_text("not an image")
+
+        assert not FileService.is_valid_image(str(text_path))
+
+    def test_missing_file_is_invalid(self, tmp_path):
+        """Test that a path to nothing is rejected."""
+        assert not FileService.is_valid_image(str(tmp_path / "missing.png"))
+
+    def test_directory_is_invalid(self, tmp_path):
+        """Test that a directory is rejected even when its name looks like an image."""
+        directory = tmp_path / "folder.jpg"
+        directory.mkdir()
+
+        assert not FileService.is_valid_image(str(directory))
+
+    def test_unsupported_extension_skips_stat(self):
+        """Test that the file system is not queried for a path with an unsupported extension."""
+        with patch('src.services.file_service.os.stat') as mock_stat:
+            assert not FileService.is_valid_image("/fake/archive.zip")
+
+        mock_stat.assert_not_called()
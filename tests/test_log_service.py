@@ -0,0 +1,94 @@
+"""
+Unit tests for the batched logging handler and the cached-time formatter.
+"""
+import io
+import logging
+import time
+from unittest.mock import patch
+
+import pytest
+
+from src.services.log_service import LOG_DATE_FORMAT, BatchedStreamHandler, CachedTimeFormatter
+
+
+class CountingStream(io.StringIO):
+    """A text stream that counts its write calls."""
+
+    def __init__(self):
+        super().__init__()
+        self.writes = 0
+
+    def write(self, text):
+        self.writes += 1
+        return super().write(text)
+
+
+@pytest.fixture
+def stream():
+    """Fixture for a stream counting the handler's writes."""
+    return CountingStream()
+
+@pytest.fixture
+def logger(stream):
+    """Fixture for an isolated logger writing through a BatchedStreamHandler."""
+    handler = BatchedStreamHandler(capacity=10, stream=stream)
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    instance = logging.getLogger('test_log_service')
+    instance.propagate = False
+    instance.setLevel(logging.INFO)
+    instance.addHandler(handler)
+    yield instance
+    instance.removeHandler(handler)
+    handler.close()
+
+
+class TestBatchedStreamHandler:
+    """Test cases for BatchedStreamHandler."""
+
+    def test_info_records_written_together(self, logger, stream):
+        """Test that info records wait in the buffer and are written in one call when it fills."""
+        for i in range(9):
+            logger.info("record %d", i)
+        assert stream.writes == 0
+
+        logger.info("record 9")
+
+        assert stream.writes == 1
+        assert stream.getvalue().splitlines() == [f"record {i}" for i in range(10)]
+
+    def test_warning_flushes_immediately(self, logger, stream):
+        """Test that a warning is written at once, together with the records before it."""
+        logger.info("first")
+        logger.warning("careful")
+
+        assert stream.writes == 1
+        assert stream.getvalue() == "first\ncareful\n"
+
+
+class TestCachedTimeFormatter:
+    """Test cases for CachedTimeFormatter."""
+
+    @staticmethod
+    def make_record(created):
+        """Build an info record created at the given epoch time."""
+        record = logging.LogRecord('test', logging.INFO, __file__, 1, "message", None, None)
+        record.created = created
+        return record
+
+    def test_matches_standard_formatter(self):
+        """Test that timestamps are identical to the ones logging.Formatter produces."""
+        cached = CachedTimeFormatter('%(asctime)s %(message)s', datefmt=LOG_DATE_FORMAT)
+        standard = logging.Formatter('%(asctime)s %(message)s', datefmt=LOG_DATE_FORMAT)
+
+        for created in (1700000000.1, 1700000000.9, 1700000001.0, 1700000061.5):
+            assert cached.format(self.make_record(created)) == standard.format(self.make_record(created))
+
+    def test_formats_each_second_once(self):
+        """Test that records within the same second reuse the formatted timestamp."""
+        formatter = CachedTimeFormatter(datefmt=LOG_DATE_FORMAT)
+
+        with patch('src.services.log_service.time.strftime', wraps=time.strftime) as mock_strftime:
+            for created in (1700000000.1, 1700000000.5, 1700000000.9, 1700000001.2):
+                formatter.formatTime(self.make_record(created), LOG_DATE_FORMAT)
+
+        assert mock_strftime.call_count == 2
@@ -2,8 +2,13 @@
 Unit tests for the refactored OCR Controller and its interaction with services.
 """
 import sys
+import threading
 import pytest
 from unittest.mock import MagicMock, patch, call
+import cv2
+import numpy as np
+import pandas as pd
+from PySide6.QtCore import QThreadPool
 from PySide6.QtWidgets import QApplication
 
 # Ensure the application instance is available for QObject-based classes
@@ -52,6 +57,9 @@ class TestOCRControllerRefactored:
 
     def test_initialization(self, controller):
         """Test that the controller initializes and connects signals correctly."""
+        controller.ocr_service.start_warmup.assert_called_once_with()
+        # The table service is only built once a table feature is used
+        assert controller._table_ocr_service is None
         controller.view.open_file_requested.connect.assert_called_with(controller.select_image_file)
         controller.view.save_text_requested.connect.assert_called_with(controller.save_text_to_file)
         controller.view.extract_text_requested.connect.assert_called_with(controller.on_extract_text_requested)
@@ -128,6 +136,72 @@ class TestOCRControllerRefactored:
         controller.view.set_extracted_text.assert_called_with("extracted text")
         controller.view.show_success.assert_called_with("Text extraction completed successfully.")
 
+    def test_on_extract_text_streams_lines(self, controller):
+        """Test that the previous text is only cleared once the first line arrives."""
+        controller.current_image_path = "/fake/image.png"
+        controller.file_service.is_valid_image.return_value = True
+
+        controller.on_extract_text_requested()
+        controller.view.clear_text.assert_not_called()
+
+        line_callback = controller.ocr_service.extract_text.call_args.kwargs['line_callback']
+        line_callback("first line")
+        line_callback("second line")
+
+        controller.view.clear_text.assert_called_once_with()
+        assert controller.view.append_extracted_text.call_args_list == [call("first line"), call("second line")]
+
+    def test_on_extract_text_failure_keeps_previous_text(self, controller):
+        """Test that a failed extraction leaves the text from the previous run in place."""
+        controller.current_image_path = "/fake/image.png"
+        controller.file_service.is_valid_image.return_value = True
+
+        controller.on_extract_text_requested()
+        controller.ocr_service.extract_text.call_args.kwargs['error_callback']("OCR engine failed")
+
+        controller.view.clear_text.assert_not_called()
+        controller.view.set_extracted_text.assert_not_called()
+
+    def test_image_validated_once_per_selection(self, controller):
+        """Test that repeated extractions reuse the validation of the selected image."""
+        image_path = "/fake/image.png"
+        controller.file_service.is_valid_image.return_value = True
+        controller.on_image_selected(image_path)
+
+        controller.on_extract_text_requested()
+        controller.on_extract_text_requested()
+        controller.file_service.is_valid_image.assert_called_once_with(image_path)
+
+        # A new selection is validated again
+        controller.on_image_selected("/fake/other.png")
+        controller.on_extract_text_requested()
+        controller.file_service.is_valid_image.assert_called_with("/fake/other.png")
+        assert controller.file_service.is_valid_image.call_count == 2
+
+    def test_on_extract_batch_success(self, controller):
+        """Test that a batch extraction shows one section per image."""
+        controller.file_service.select_image_files.return_value = ["/fake/a.png", "/fake/notes.txt", "/fake/b.png"]
+        controller.file_service.is_valid_image.side_effect = lambda path: path.endswith(".png")
+
+        controller.on_extract_batch_requested()
+
+        args, kwargs = controller.ocr_service.extract_batch.call_args
+        assert args[0] == ["/fake/a.png", "/fake/b.png"]
+        kwargs['success_callback'](["text a", "text b"])
+
+        controller.view.show_progress.assert_called_once_with(True)
+        controller.view.set_extracted_text.assert_called_once_with("=== a.png ===\ntext a\n\n=== b.png ===\ntext b")
+
+    def test_on_extract_batch_no_valid_images(self, controller):
+        """Test that a selection without valid images is rejected."""
+        controller.file_service.select_image_files.return_value = ["/fake/notes.txt"]
+        controller.file_service.is_valid_image.return_value = False
+
+        controller.on_extract_batch_requested()
+
+        controller.view.show_warning.assert_called_once_with("None of the selected files is a valid image.")
+        controller.ocr_service.extract_batch.assert_not_called()
+
     def test_on_extraction_error(self, controller):
         """Test the error handling during text extraction."""
         error_msg = "OCR engine failed"
@@ -182,10 +256,185 @@ class TestOCRControllerRefactored:
         controller.view.get_text_content.return_value = text_to_copy
 
         controller.on_copy_text_requested()
+        # The clipboard write is deferred to the event loop
+        clipboard_instance.setText.assert_not_called()
+        app.processEvents()
 
         clipboard_instance.setText.assert_called_with(text_to_copy)
         controller.view.set_copy_button_text.assert_called_with("Copied ✓")
 
+    def test_on_extract_table_runs_in_pool(self, controller, tmp_path):
+        """Test that table extraction runs on the thread pool and updates the view."""
+        image_path = tmp_path / "table.png"
+        cv2.imwrite(str(image_path), np.full((20, 20, 3), 255, dtype=np.uint8))
+        table_data = pd.DataFrame({'Subject': ['Math'], 'HK1': [8.5]})
+        controller.table_ocr_service = MagicMock()
+        controller.table_ocr_service.extract_table_data.return_value = table_data
+        controller.table_ocr_service.detect_metadata.return_value = {'class': '10A11'}
+        controller.file_service.is_valid_image.return_value = True
+        controller.current_image_path = str(image_path)
+
+        controller.on_extract_table_requested()
+        QThreadPool.globalInstance().waitForDone()
+        app.processEvents()
+
+        controller.view.set_table_data.assert_called_once_with(table_data)
+        controller.view.set_metadata.assert_called_once_with({'class': '10A11'})
+        assert controller.current_table_data is table_data
+        controller.view.show_progress.assert_called_with(False)
+
+    def test_table_service_built_off_the_gui_thread(self, controller, tmp_path):
+        """Test that the first table request builds the table service on a pooled thread and keeps it."""
+        image_path = tmp_path / "table.png"
+        cv2.imwrite(str(image_path), np.full((20, 20, 3), 255, dtype=np.uint8))
+        controller.file_service.is_valid_image.return_value = True
+        controller.current_image_path = str(image_path)
+        built_on = []
+
+        def build_service():
+            built_on.append(threading.current_thread())
+            service = MagicMock()
+            service.extract_table_data.return_value = pd.DataFrame()
+            service.detect_metadata.return_value = {}
+            return service
+
+        with patch('src.services.table_ocr_service.TableOCRService', side_effect=build_service):
+            controller.on_extract_table_requested()
+            assert controller._table_ocr_service is None
+            QThreadPool.globalInstance().waitForDone()
+            app.processEvents()
+
+        assert built_on and built_on[0] is not threading.main_thread()
+        assert controller._table_ocr_service is not None
+        controller._table_ocr_service.extract_table_data.assert_called_once()
+        controller.view.show_progress.assert_called_with(False)
+
+    def test_on_extract_table_reads_full_resolution(self, controller, tmp_path):
+        """Test that a large image reaches the table service at its full size."""
+        image_path = tmp_path / "large_table.png"
+        cv2.imwrite(str(image_path), np.full((100, 2400, 3), 255, dtype=np.uint8))
+        controller.table_ocr_service = MagicMock()
+        controller.table_ocr_service.extract_table_data.return_value = pd.DataFrame()
+        controller.table_ocr_service.detect_metadata.return_value = {}
+        controller.file_service.is_valid_image.return_value = True
+        controller.current_image_path = str(image_path)
+
+        controller.on_extract_table_requested()
+        QThreadPool.globalInstance().waitForDone()
+        app.processEvents()
+
+        assert controller.table_ocr_service.extract_table_data.call_args[0][0].shape == (100, 2400, 3)
+
+    def test_on_extract_table_reuses_decoded_image(self, controller, tmp_path):
+        """Test that table extraction uses the image decoded after selection."""
+        image_path = tmp_path / "table.png"
+        cv2.imwrite(str(image_path), np.full((20, 20, 3), 255, dtype=np.uint8))
+        controller.table_ocr_service = MagicMock()
+        controller.table_ocr_service.extract_table_data.return_value = pd.DataFrame()
+        controller.table_ocr_service.detect_metadata.return_value = {}
+        controller.file_service.is_valid_image.return_value = True
+
+        controller.on_image_selected(str(image_path))
+        QThreadPool.globalInstance().waitForDone()
+        app.processEvents()
+        decoded = controller.get_decoded_image()
+        assert decoded is not None
+
+        with patch('src.controller.ocr_controller.smart_imread') as mock_imread:
+            controller.on_extract_table_requested()
+            QThreadPool.globalInstance().waitForDone()
+            app.processEvents()
+
+        mock_imread.assert_not_called()
+        assert controller.table_ocr_service.extract_table_data.call_args[0][0] is decoded
+
+    def test_on_extract_table_skips_reduced_decode(self, controller, tmp_path):
+        """Test that a background decode at reduced resolution is not handed to the table service."""
+        image_path = tmp_path / "large_table.png"
+        cv2.imwrite(str(image_path), np.full((100, 2400, 3), 255, dtype=np.uint8))
+        controller.table_ocr_service = MagicMock()
+        controller.table_ocr_service.extract_table_data.return_value = pd.DataFrame()
+        controller.table_ocr_service.detect_metadata.return_value = {}
+        controller.file_service.is_valid_image.return_value = True
+
+        controller.on_image_selected(str(image_path))
+        QThreadPool.globalInstance().waitForDone()
+        app.processEvents()
+        assert controller.get_decoded_image().shape == (50, 1200, 3)
+
+        controller.on_extract_table_requested()
+        QThreadPool.globalInstance().waitForDone()
+        app.processEvents()
+
+        assert controller.table_ocr_service.extract_table_data.call_args[0][0].shape == (100, 2400, 3)
+
+    def test_on_extract_table_unreadable_image(self, controller):
+        """Test that an unreadable image is reported from the worker."""
+        controller.table_ocr_service = MagicMock()
+        controller.file_service.is_valid_image.return_value = True
+        controller.current_image_path = "/fake/missing.png"
+
+        controller.on_extract_table_requested()
+        QThreadPool.globalInstance().waitForDone()
+        app.processEvents()
+
+        controller.view.show_error.assert_called_once_with("Failed to load the image.")
+        controller.table_ocr_service.extract_table_data.assert_not_called()
+        controller.view.show_progress.assert_called_with(False)
+
+    @patch('src.controller.ocr_controller.cv2.VideoCapture')
+    def test_webcam_frame_used_in_memory(self, mock_capture, controller):
+        """Test that a webcam frame is displayed and extracted without a temporary file."""
+        frame = np.zeros((10, 10, 3), dtype=np.uint8)
+        camera = mock_capture.return_value
+        camera.isOpened.return_value = True
+        camera.read.return_value = (True, frame)
+
+        with patch('src.controller.ocr_controller.cv2.imwrite') as mock_imwrite:
+            controller.on_capture_webcam_requested()
+        mock_imwrite.assert_not_called()
+        controller.view.set_image_array.assert_called_once()
+        assert controller.view.set_image_array.call_args[0][0] is frame
+
+        controller.on_extract_text_requested()
+
+        controller.file_service.is_valid_image.assert_not_called()
+        assert controller.ocr_service.extract_text.call_args[0][0] is frame
+
+    @patch('src.controller.ocr_controller.cv2.VideoCapture')
+    def test_webcam_kept_open_between_captures(self, mock_capture, controller):
+        """Test that the webcam is opened once for repeated captures and released when idle."""
+        camera = mock_capture.return_value
+        camera.isOpened.return_value = True
+        camera.read.return_value = (True, np.zeros((10, 10, 3), dtype=np.uint8))
+
+        controller.on_capture_webcam_requested()
+        controller.on_capture_webcam_requested()
+
+        mock_capture.assert_called_once_with(0)
+        camera.release.assert_not_called()
+        assert controller._webcam_idle_timer.isActive()
+
+        # Simulate the idle timeout
+        controller._webcam_idle_timer.timeout.emit()
+        camera.release.assert_called_once()
+        assert controller._webcam is None
+
+    @patch('src.controller.ocr_controller.QApplication.clipboard')
+    def test_on_copy_table_sets_tsv_mime_data(self, mock_clipboard, controller):
+        """Test that table data is copied as both plain text and TSV."""
+        clipboard_instance = mock_clipboard.return_value
+        controller.current_table_data = pd.DataFrame({'Subject': ['Math'], 'HK1': [8.5]})
+        controller.table_ocr_service = MagicMock()
+        controller.table_ocr_service.dataframe_to_clipboard_format.return_value = "Subject\tHK1\nMath\t8.5\n"
+
+        controller.on_copy_table_requested()
+        app.processEvents()
+
+        mime = clipboard_instance.setMimeData.call_args[0][0]
+        assert mime.text() == "Subject\tHK1\nMath\t8.5\n"
+        assert bytes(mime.data('text/tab-separated-values')) == b"Subject\tHK1\nMath\t8.5\n"
+
     def test_cleanup(self, controller):
         """Test that the cleanup method on the ocr_service is called."""
         controller.cleanup()
@@ -1,11 +1,13 @@
 """
 Unit tests for OCR Model
 """
-from src.model.ocr_model import OCRModel
+from src.model import ocr_model as ocr_model_module
+from src.model.ocr_model import OCRModel, get_shared_model, smart_imread
 import pytest
 import os
 import sys
 import tempfile
+from unittest.mock import MagicMock, patch
 import numpy as np
 from PIL import Image, ImageDraw, ImageFont
 
@@ -202,6 +204,312 @@ class TestOCRModel:
             ocr_model.extract_text("invalid_image.png")
 
 
+@pytest.fixture
+def reset_shared_model():
+    """Run a test without a cached model or reader, and leave none behind"""
+    ocr_model_module._shared_model = None
+    ocr_model_module._READER_CACHE.clear()
+    yield
+    ocr_model_module._shared_model = None
+    ocr_model_module._READER_CACHE.clear()
+
+
+@pytest.mark.usefixtures("reset_shared_model")
+class TestSharedModel:
+    """Test cases for the process-wide shared model"""
+
+    def test_same_languages_reuse_model(self):
+        """Test that the reader is only built once for the same languages"""
+        with patch('easyocr.Reader') as mock_reader:
+            first = get_shared_model(['en'])
+            second = get_shared_model(('en',))
+
+        assert first is second
+        mock_reader.assert_called_once_with(['en'], quantize=True)
+
+    def test_different_languages_rebuild_model(self):
+        """Test that requesting other languages replaces the shared model"""
+        with patch('easyocr.Reader'):
+            first = get_shared_model(['en'])
+            second = get_shared_model(['en', 'vi'])
+
+        assert first is not second
+        assert second.languages == ['en', 'vi']
+
+    def test_models_share_reader(self):
+        """Test that separate models with the same languages reuse one reader"""
+        with patch('easyocr.Reader') as mock_reader:
+            first = OCRModel(languages=['en', 'vi'])
+            second = OCRModel(languages=['vi', 'en'])
+
+        assert first.reader is second.reader
+        mock_reader.assert_called_once_with(['en', 'vi'], quantize=True)
+
+    def test_cpu_reader_keeps_full_precision(self):
+        """Test that fp16 is only applied to readers on a CUDA device"""
+        with patch('easyocr.Reader') as mock_reader:
+            mock_reader.return_value.device = 'cpu'
+            model = OCRModel(languages=['en'], precision='fp16')
+
+        model.reader.detector.half.assert_not_called()
+        model.reader.recognizer.half.assert_not_called()
+
+    def test_cuda_reader_converted_to_half(self):
+        """Test that fp16 converts both networks of a CUDA reader"""
+        with patch('easyocr.Reader') as mock_reader:
+            reader = mock_reader.return_value
+            reader.device = 'cuda'
+            detector, recognizer = reader.detector, reader.recognizer
+            model = OCRModel(languages=['en'], precision='fp16')
+
+        detector.half.assert_called_once_with()
+        recognizer.half.assert_called_once_with()
+        assert model.reader.detector is detector.half.return_value
+
+    def test_fp32_reader_not_quantized(self):
+        """Test that fp32 asks EasyOCR to keep the CPU recognizer's float weights"""
+        with patch('easyocr.Reader') as mock_reader:
+            OCRModel(languages=['en'], precision='fp32')
+
+        mock_reader.assert_called_once_with(['en'], quantize=False)
+
+    def test_invalid_precision(self):
+        """Test that unknown precisions are rejected"""
+        with pytest.raises(ValueError):
+            OCRModel(languages=['en'], precision='int8')
+
+
+class TestHalfPrecision:
+    """Test cases for running a network in half precision"""
+
+    def test_hooks_cast_inputs_and_outputs(self):
+        """Test that a converted network takes and returns float32 tensors"""
+        torch = pytest.importorskip('torch')
+        reader = MagicMock()
+        reader.detector = torch.nn.Identity()
+        reader.recognizer = torch.nn.Identity()
+
+        ocr_model_module._convert_reader_to_half(reader)
+        seen = []
+        reader.detector.register_forward_hook(lambda module, args, output: seen.append(args[0].dtype))
+        output = reader.detector(torch.ones(2, 2))
+
+        assert seen == [torch.float16]
+        assert output.dtype == torch.float32
+
+
+class TestTorchThreads:
+    """Test cases for sizing torch's thread pools"""
+
+    @pytest.fixture(autouse=True)
+    def unconfigured(self, monkeypatch):
+        """Run a test as if torch's thread pools had not been sized yet"""
+        monkeypatch.setattr(ocr_model_module, '_torch_threads_configured', False)
+
+    def test_configured_once(self):
+        """Test that the pools are sized for the first reader only"""
+        torch = pytest.importorskip('torch')
+        with patch('os.cpu_count', return_value=8), \
+             patch.object(torch, 'set_num_threads') as set_num_threads, \
+             patch.object(torch, 'set_num_interop_threads') as set_num_interop_threads:
+            ocr_model_module._configure_torch_threads()
+            ocr_model_module._configure_torch_threads()
+
+        set_num_threads.assert_called_once_with(7)
+        set_num_interop_threads.assert_called_once_with(1)
+
+    def test_late_interop_setting_ignored(self):
+        """Test that torch refusing a late inter-op size does not fail reader creation"""
+        torch = pytest.importorskip('torch')
+        with patch.object(torch, 'set_num_threads'), \
+             patch.object(torch, 'set_num_interop_threads', side_effect=RuntimeError("already started")):
+            ocr_model_module._configure_torch_threads()
+
+        assert ocr_model_module._torch_threads_configured
+
+
+class TestSmartImread:
+    """Test cases for reduced-resolution image loading"""
+
+    @pytest.fixture
+    def large_image_path(self, tmp_path):
+        """Create an image whose long side is above the 1/2 decode threshold"""
+        path = tmp_path / "large.png"
+        Image.new('RGB', (2400, 100), color='white').save(path)
+        return str(path)
+
+    def test_small_image_full_resolution(self, tmp_path):
+        """Test that small images are decoded unchanged"""
+        path = tmp_path / "small.png"
+        Image.new('RGB', (300, 100), color='white').save(path)
+
+        image, scale = smart_imread(str(path))
+
+        assert scale == 1
+        assert image.shape == (100, 300, 3)
+
+    def test_large_image_reduced(self, large_image_path):
+        """Test that large images are decoded at half resolution"""
+        image, scale = smart_imread(large_image_path)
+
+        assert scale == 2
+        assert image.shape == (50, 1200, 3)
+
+    @pytest.mark.usefixtures("reset_shared_model")
+    def test_confidence_boxes_rescaled(self, large_image_path):
+        """Test that boxes from a reduced decode are mapped back to file coordinates"""
+        with patch('easyocr.Reader'):
+            model = OCRModel(languages=['en'])
+        model.reader.readtext.return_value = [([[1, 2], [3, 2], [3, 4], [1, 4]], 'text', 0.9)]
+
+        results = model.get_text_with_confidence(large_image_path, preprocess=False)
+
+        assert results == [([[2, 4], [6, 4], [6, 8], [2, 8]], 'text', 0.9)]
+
+
+@pytest.mark.usefixtures("reset_shared_model")
+class TestPreprocessUMat:
+    """Test cases for the OpenCL (UMat) preprocessing path"""
+
+    @pytest.fixture
+    def model(self):
+        """Create a model backed by a mocked EasyOCR reader"""
+        with patch('easyocr.Reader'):
+            return OCRModel(languages=['en'])
+
+    def test_umat_path_matches_array_path(self, model):
+        """Test that the UMat path produces the same image as the array path"""
+        image = np.random.default_rng(0).integers(0, 255, (120, 80, 3), dtype=np.uint8)
+
+        model._use_umat = False
+        expected = model.preprocess_image(image)
+        model._use_umat = True
+        result = model.preprocess_image(image)
+
+        assert isinstance(result, np.ndarray)
+        np.testing.assert_array_equal(result, expected)
+
+    def test_opencl_kernels_warmed_up_on_construction(self):
+        """Test that preprocessing runs once at construction when OpenCL is in use"""
+        with patch('easyocr.Reader'), \
+                patch('src.model.ocr_model.cv2.ocl.haveOpenCL', return_value=True), \
+                patch('src.model.ocr_model.cv2.ocl.useOpenCL', return_value=True), \
+                patch.object(OCRModel, 'preprocess_image') as mock_preprocess:
+            OCRModel(languages=['en'])
+
+        mock_preprocess.assert_called_once()
+        assert mock_preprocess.call_args[0][0].shape == (32, 32, 3)
+
+    def test_portrait_image_keeps_orientation(self, model):
+        """Test that portrait images are not rotated by preprocessing"""
+        image = np.full((120, 80, 3), 255, dtype=np.uint8)
+
+        assert model.preprocess_image(image).shape == (120, 80)
+
+    def test_grayscale_buffer_reused_results_kept(self, model):
+        """Test that the grayscale buffer is reused while each result stays independent"""
+        model._use_umat = False
+        rng = np.random.default_rng(1)
+        first_image = rng.integers(0, 255, (60, 40, 3), dtype=np.uint8)
+        second_image = rng.integers(0, 255, (60, 40, 3), dtype=np.uint8)
+
+        first = model.preprocess_image(first_image)
+        first_copy = first.copy()
+        buffer = model._scratch.gray
+        second = model.preprocess_image(second_image)
+
+        assert model._scratch.gray is buffer
+        assert first is not second
+        np.testing.assert_array_equal(first, first_copy)
+
+
+@pytest.mark.usefixtures("reset_shared_model")
+class TestBatchExtract:
+    """Test cases for batched text extraction"""
+
+    @pytest.fixture
+    def model(self):
+        """Create a model backed by a mocked EasyOCR reader"""
+        with patch('easyocr.Reader'):
+            return OCRModel(languages=['en'])
+
+    def make_image(self, tmp_path, name, size):
+        """Save a blank image and return its path"""
+        path = tmp_path / name
+        Image.new('RGB', size, color='white').save(path)
+        return str(path)
+
+    def test_same_size_images_batched(self, model, tmp_path):
+        """Test that equally sized images go through one batched call"""
+        paths = [self.make_image(tmp_path, f"frame{i}.png", (300, 100)) for i in range(3)]
+        model.reader.readtext_batched.return_value = [
+            [(None, f"text {i}", 0.9), (None, "noise", 0.1)] for i in range(3)
+        ]
+
+        texts = model.batch_extract(paths)
+
+        assert texts == ["text 0", "text 1", "text 2"]
+        model.reader.readtext_batched.assert_called_once()
+        model.reader.readtext.assert_not_called()
+
+    def test_mixed_size_images_read_individually(self, model, tmp_path):
+        """Test that differently sized images fall back to one call per image"""
+        paths = [
+            self.make_image(tmp_path, "a.png", (300, 100)),
+            self.make_image(tmp_path, "b.png", (400, 100)),
+        ]
+        model.reader.readtext.side_effect = [[(None, "a", 0.9)], [(None, "b", 0.9)]]
+
+        assert model.batch_extract(paths) == ["a", "b"]
+        model.reader.readtext_batched.assert_not_called()
+
+    def test_consecutive_same_size_runs_batched(self, model, tmp_path):
+        """Test that a run of equally sized images is batched even when other sizes follow"""
+        paths = [
+            self.make_image(tmp_path, "a.png", (300, 100)),
+            self.make_image(tmp_path, "b.png", (300, 100)),
+            self.make_image(tmp_path, "c.png", (400, 100)),
+        ]
+        model.reader.readtext_batched.return_value = [[(None, "a", 0.9)], [(None, "b", 0.9)]]
+        model.reader.readtext.return_value = [(None, "c", 0.9)]
+
+        assert model.batch_extract(paths) == ["a", "b", "c"]
+        assert len(model.reader.readtext_batched.call_args[0][0]) == 2
+        model.reader.readtext.assert_called_once()
+
+    def test_interleaved_sizes_batched_by_size(self, model, tmp_path):
+        """Test that equally sized images are batched together even when not adjacent"""
+        paths = [
+            self.make_image(tmp_path, "a.png", (300, 100)),
+            self.make_image(tmp_path, "b.png", (400, 100)),
+            self.make_image(tmp_path, "c.png", (300, 100)),
+            self.make_image(tmp_path, "d.png", (400, 100)),
+        ]
+        model.reader.readtext_batched.side_effect = [
+            [[(None, "a", 0.9)], [(None, "c", 0.9)]],
+            [[(None, "b", 0.9)], [(None, "d", 0.9)]],
+        ]
+
+        assert model.batch_extract(paths) == ["a", "b", "c", "d"]
+        assert model.reader.readtext_batched.call_count == 2
+        model.reader.readtext.assert_not_called()
+
+    def test_confidence_threshold_configurable(self, tmp_path):
+        """Test that the confidence cut-off comes from the constructor"""
+        with patch('easyocr.Reader'):
+            model = OCRModel(languages=['en'], confidence_threshold=0.2)
+        path = self.make_image(tmp_path, "a.png", (300, 100))
+        model.reader.readtext.return_value = [(None, "kept", 0.3), (None, "dropped", 0.1)]
+
+        assert model.extract_text(path) == "kept"
+        model.reader.readtext.assert_called_once()
+        assert model.reader.readtext.call_args.kwargs['min_size'] == 20
+
+    def test_empty_batch(self, model):
+        """Test that an empty batch does no work"""
+        assert model.batch_extract([]) == []
+
+
 # Additional test to run manually if needed
 def test_ocr_functionality_manual():
     """
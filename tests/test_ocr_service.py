@@ -0,0 +1,257 @@
+"""
+Unit tests for the OCR service and its pooled worker tasks.
+"""
+import os
+import sys
+import pytest
+from unittest.mock import MagicMock, patch
+from PySide6.QtWidgets import QApplication
+
+# Ensure the application instance is available for QObject-based classes
+app = QApplication.instance()
+if app is None:
+    app = QApplication(sys.argv)
+
+from src.services.ocr_service import OCRService
+
+
+@pytest.fixture
+def mock_model():
+    """Fixture for a mocked OCRModel."""
+    model = MagicMock()
+    model.extract_text.return_value = "extracted text"
+    return model
+
+@pytest.fixture
+def service(mock_model):
+    """Fixture for OCRService backed by a mocked model."""
+    with patch('src.model.ocr_model.get_shared_model', return_value=mock_model):
+        instance = OCRService(languages=['en'])
+    yield instance
+    instance.cleanup()
+
+
+def run_extraction(service, image_path):
+    """Runs an extraction to completion and returns the callback results."""
+    results = {'text': [], 'error': [], 'finished': 0}
+
+    def on_finished():
+        results['finished'] += 1
+
+    service.extract_text(
+        image_path,
+        success_callback=results['text'].append,
+        error_callback=results['error'].append,
+        finished_callback=on_finished
+    )
+    service.pool.waitForDone()
+    app.processEvents()
+    return results
+
+
+class TestOCRService:
+    """Test cases for OCRService."""
+
+    def test_extract_text_success(self, service, mock_model):
+        """Test that a pooled task delivers the extracted text."""
+        results = run_extraction(service, "/fake/image.png")
+
+        mock_model.extract_text.assert_called_once_with("/fake/image.png")
+        assert results['text'] == ["extracted text"]
+        assert results['error'] == []
+        assert results['finished'] == 1
+
+    def test_extract_text_error(self, service, mock_model):
+        """Test that model failures are reported through the error callback."""
+        mock_model.extract_text.side_effect = RuntimeError("engine failed")
+
+        results = run_extraction(service, "/fake/image.png")
+
+        assert results['text'] == []
+        assert results['error'] == ["Failed to process image: engine failed"]
+        assert results['finished'] == 1
+
+    def test_extract_text_without_model(self, service):
+        """Test that extraction is rejected when the model failed to load."""
+        service.model = None
+        error_callback = MagicMock()
+
+        service.extract_text("/fake/image.png", MagicMock(), error_callback, MagicMock())
+
+        error_callback.assert_called_once_with("OCR model is not initialized. Cannot extract text.")
+
+    def test_extract_batch_success(self, service, mock_model):
+        """Test that a batch task delivers one text per image."""
+        mock_model.batch_extract.return_value = ["first", "second"]
+        results = {'texts': [], 'error': [], 'finished': 0}
+
+        def on_finished():
+            results['finished'] += 1
+
+        service.extract_batch(
+            ["/fake/a.png", "/fake/b.png"],
+            success_callback=results['texts'].append,
+            error_callback=results['error'].append,
+            finished_callback=on_finished
+        )
+        service.pool.waitForDone()
+        app.processEvents()
+
+        mock_model.batch_extract.assert_called_once_with(["/fake/a.png", "/fake/b.png"])
+        assert results['texts'] == [["first", "second"]]
+        assert results['error'] == []
+        assert results['finished'] == 1
+
+    def test_extract_text_streams_lines(self, service, mock_model):
+        """Test that lines are delivered one by one before the joined text."""
+        mock_model.iter_text_lines.return_value = iter(["first line", "second line"])
+        lines = []
+        texts = []
+
+        service.extract_text(
+            "/fake/image.png",
+            success_callback=texts.append,
+            error_callback=MagicMock(),
+            finished_callback=MagicMock(),
+            line_callback=lines.append
+        )
+        service.pool.waitForDone()
+        app.processEvents()
+
+        mock_model.extract_text.assert_not_called()
+        assert lines == ["first line", "second line"]
+        assert texts == ["first line\nsecond line"]
+
+    def test_warmup_runs_once(self, service, mock_model):
+        """Test that the warmup inference runs on a blank image only once."""
+        service.start_warmup()
+        service.pool.waitForDone()
+        service.warmup()
+
+        mock_model.reader.readtext.assert_called_once()
+        blank = mock_model.reader.readtext.call_args[0][0]
+        assert blank.shape == (64, 64, 3)
+        assert not blank.any()
+
+    def test_warmup_failure_is_swallowed(self, service, mock_model):
+        """Test that a failing warmup does not raise."""
+        mock_model.reader.readtext.side_effect = RuntimeError("no device")
+
+        service.warmup()
+
+        assert service._warmed
+
+    def test_background_load_queues_requests(self, mock_model):
+        """Test that requests made while the model loads run once it is ready."""
+        with patch('src.model.ocr_model.get_shared_model', return_value=mock_model):
+            service = OCRService(languages=['en'], load_async=True)
+            texts = []
+            service.extract_text("/fake/image.png", texts.append, MagicMock(), MagicMock())
+            service.start_warmup()
+            service.pool.waitForDone()
+
+        # The queued request starts when the ready signal reaches the service's thread
+        app.processEvents()
+        service.pool.waitForDone()
+        app.processEvents()
+
+        assert service.model is mock_model
+        assert texts == ["extracted text"]
+        mock_model.reader.readtext.assert_called_once()
+        service.cleanup()
+
+    def test_background_load_failure_reports_queued_requests(self):
+        """Test that queued requests get an error when the model fails to load."""
+        with patch('src.model.ocr_model.get_shared_model', side_effect=RuntimeError("no weights")):
+            service = OCRService(languages=['en'], load_async=True)
+            error_callback = MagicMock()
+            service.extract_batch(["/fake/a.png"], MagicMock(), error_callback, MagicMock())
+            service.pool.waitForDone()
+
+        app.processEvents()
+
+        error_callback.assert_called_once_with("OCR model is not initialized. Cannot extract text.")
+
+    def test_unchanged_file_reuses_text(self, service, mock_model, tmp_path):
+        """Test that text from an unchanged file is returned without running the model again."""
+        image_path = tmp_path / "scan.png"
+        image_path.write_bytes(b"pixels")
+
+        first = run_extraction(service, str(image_path))
+        second = run_extraction(service, str(image_path))
+
+        assert first['text'] == second['text'] == ["extracted text"]
+        assert second['finished'] == 1
+        mock_model.extract_text.assert_called_once()
+
+    def test_changed_file_extracted_again(self, service, mock_model, tmp_path):
+        """Test that a file whose contents changed is read by the model again."""
+        image_path = tmp_path / "scan.png"
+        image_path.write_bytes(b"pixels")
+        run_extraction(service, str(image_path))
+
+        image_path.write_bytes(b"other pixels")
+        run_extraction(service, str(image_path))
+
+        assert mock_model.extract_text.call_count == 2
+
+    def test_result_cache_evicts_least_recently_used(self, service, mock_model, tmp_path):
+        """Test that the cache keeps only the most recently used files."""
+        paths = []
+        for i in range(3):
+            path = tmp_path / f"scan{i}.png"
+            path.write_bytes(b"pixels")
+            paths.append(str(path))
+
+        with patch('src.services.ocr_service.RESULT_CACHE_SIZE', 2):
+            run_extraction(service, paths[0])
+            run_extraction(service, paths[1])
+            run_extraction(service, paths[0])
+            run_extraction(service, paths[2])
+            run_extraction(service, paths[1])
+
+        assert [call.args[0] for call in mock_model.extract_text.call_args_list] == [
+            paths[0], paths[1], paths[2], paths[1]
+        ]
+
+    def test_coarse_mtime_adds_content_hash(self, service, mock_model, tmp_path):
+        """Test that a same-size rewrite within a whole-second timestamp is still noticed."""
+        image_path = tmp_path / "scan.png"
+        image_path.write_bytes(b"pixels")
+        os.utime(image_path, ns=(1_700_000_000_000_000_000, 1_700_000_000_000_000_000))
+        run_extraction(service, str(image_path))
+
+        image_path.write_bytes(b"PIXELS")
+        os.utime(image_path, ns=(1_700_000_000_000_000_000, 1_700_000_000_000_000_000))
+        run_extraction(service, str(image_path))
+
+        assert mock_model.extract_text.call_count == 2
+
+    def test_cancelled_stream_stops_emitting(self, service, mock_model):
+        """Test that a task cancelled mid-stream delivers no more lines, text or finished signal."""
+        def lines():
+            yield "first line"
+            # What cleanup does on the GUI thread while the worker is recognizing
+            service._cancelled.set()
+            yield "second line"
+
+        mock_model.iter_text_lines.return_value = lines()
+        received = []
+        finished = MagicMock()
+
+        service.extract_text("/fake/image.png", received.append, received.append, finished,
+                             line_callback=received.append)
+        service.pool.waitForDone()
+        app.processEvents()
+
+        assert received == ["first line"]
+        finished.assert_not_called()
+
+    def test_extraction_after_cleanup_does_nothing(self, service, mock_model):
+        """Test that tasks started after cleanup skip the model and report nothing."""
+        service.cleanup()
+
+        results = run_extraction(service, "/fake/image.png")
+
+        mock_model.extract_text.assert_not_called()
+        assert results == {'text': [], 'error': [], 'finished': 0}
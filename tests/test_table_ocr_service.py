@@ -0,0 +1,293 @@
+"""
+Unit tests for the table OCR service's preprocessing and batched EasyOCR fallback.
+"""
+from unittest.mock import MagicMock, patch
+
+import cv2
+import numpy as np
+import pytest
+
+from src.services.table_ocr_service import TableOCRService
+
+
+def easyocr_line(text, top):
+    """Build an EasyOCR result for a confident word at the given height."""
+    bbox = [[10, top], [60, top], [60, top + 10], [10, top + 10]]
+    return (bbox, text, 0.9)
+
+
+@pytest.fixture
+def service():
+    """Fixture for a service whose Tesseract fails on every page and whose EasyOCR reader is a mock."""
+    with patch.object(TableOCRService, '_initialize_easyocr'):
+        instance = TableOCRService()
+    instance._have_tesseract = True
+    instance.easyocr_reader = MagicMock()
+    instance.preprocess_image_for_table = lambda image: image
+    with patch('src.services.table_ocr_service.pytesseract.image_to_data',
+               side_effect=RuntimeError("tesseract is not installed")):
+        yield instance
+
+
+class TestPreprocessImageForTable:
+    """Test cases for TableOCRService.preprocess_image_for_table."""
+
+    @pytest.fixture
+    def skewed_table(self):
+        """Fixture for a slightly rotated table drawn on a white page."""
+        image = np.full((300, 400, 3), 255, np.uint8)
+        cv2.rectangle(image, (50, 50), (350, 250), (0, 0, 0), 2)
+        cv2.putText(image, "10A1", (100, 150), cv2.FONT_HERSHEY_SIMPLEX, 2, (0, 0, 0), 3)
+        rotation = cv2.getRotationMatrix2D((200, 150), 5, 1.0)
+        return cv2.warpAffine(image, rotation, (400, 300), borderValue=(255, 255, 255))
+
+    def test_umat_path_matches_array_path(self, skewed_table):
+        """Test that running the chain on cv2.UMat gives the same array as the CPU path."""
+        with patch.object(TableOCRService, '_initialize_easyocr'):
+            service = TableOCRService()
+
+        with patch('src.services.table_ocr_service.cv2.ocl.useOpenCL', return_value=False):
+            on_host = service.preprocess_image_for_table(skewed_table)
+        with patch('src.services.table_ocr_service.cv2.ocl.useOpenCL', return_value=True):
+            on_device = service.preprocess_image_for_table(skewed_table)
+
+        assert isinstance(on_device, np.ndarray)
+        np.testing.assert_array_equal(on_device, on_host)
+
+
+class TestDeskewImage:
+    """Test cases for TableOCRService._deskew_image."""
+
+    @pytest.fixture
+    def service(self):
+        """Fixture for a service without an EasyOCR reader."""
+        with patch.object(TableOCRService, '_initialize_easyocr'):
+            return TableOCRService()
+
+    @staticmethod
+    def skewed_frame(height, width, angle):
+        """Draw a table frame inset by a sixth of the page and rotate it by the given angle."""
+        frame = np.zeros((height, width), np.uint8)
+        cv2.rectangle(frame, (width // 6, height // 6), (width - width // 6, height - height // 6), 255, 3)
+        rotation = cv2.getRotationMatrix2D((width // 2, height // 2), angle, 1.0)
+        return cv2.warpAffine(frame, rotation, (width, height), flags=cv2.INTER_NEAREST)
+
+    @staticmethod
+    def top_edge_spread(image):
+        """Count the rows the frame's top edge spans across the middle of the page."""
+        height, width = image.shape
+        rows = np.flatnonzero(image[:height // 3, width * 3 // 8:width * 5 // 8].max(axis=1) > 127)
+        return rows.max() - rows.min()
+
+    @pytest.mark.parametrize("angle", [7, -7])
+    def test_deskew_straightens_rotated_frame(self, service, angle):
+        """Test that a frame rotated either way is rotated back level."""
+        skewed = self.skewed_frame(600, 800, angle)
+        assert self.top_edge_spread(skewed) > 20
+
+        deskewed = service._deskew_image(skewed)
+
+        assert self.top_edge_spread(deskewed) <= 6
+
+    def test_large_image_searched_at_quarter_size(self, service):
+        """Test that contours of a large image are found on a 4x smaller copy and it is still straightened."""
+        skewed = self.skewed_frame(1200, 1600, 7)
+
+        with patch('src.services.table_ocr_service.cv2.findContours', wraps=cv2.findContours) as mock_find:
+            deskewed = service._deskew_image(skewed)
+
+        assert mock_find.call_args[0][0].shape == (300, 400)
+        assert deskewed.shape == skewed.shape
+        assert self.top_edge_spread(deskewed) <= 6
+
+
+class TestDetectTableStructure:
+    """Test cases for TableOCRService.detect_table_structure."""
+
+    def test_thick_lines_found_at_their_centers(self):
+        """Test that each ruling, however thick, is reported once at its center row or column."""
+        with patch.object(TableOCRService, '_initialize_easyocr'):
+            service = TableOCRService()
+        image = np.zeros((200, 300), np.uint8)
+        image[20:23, :] = 255
+        image[100:105, :] = 255
+        image[180, :] = 255
+        image[:, 50:53] = 255
+        image[:, 250] = 255
+
+        h_lines, v_lines = service.detect_table_structure(image)
+
+        assert h_lines == [21, 102, 180]
+        assert v_lines == [51, 250]
+
+    def test_blank_image_has_no_lines(self):
+        """Test that an image without rulings has no line positions."""
+        with patch.object(TableOCRService, '_initialize_easyocr'):
+            service = TableOCRService()
+
+        assert service.detect_table_structure(np.zeros((50, 50), np.uint8)) == ([], [])
+
+
+class TestExtractTablesBatch:
+    """Test cases for TableOCRService.extract_tables_batch."""
+
+    def test_same_sized_pages_read_together(self, service):
+        """Test that same-sized pages go through one batched call, in order."""
+        reader = service.easyocr_reader
+        reader.readtext_batched.return_value = [
+            [easyocr_line("Name", 0), easyocr_line("An", 100)],
+            [easyocr_line("Name", 0), easyocr_line("Binh", 100)],
+        ]
+        pages = [np.zeros((200, 100), np.uint8), np.ones((200, 100), np.uint8)]
+
+        tables = service.extract_tables_batch(pages)
+
+        reader.readtext_batched.assert_called_once()
+        assert reader.readtext_batched.call_args[0][0][1] is pages[1]
+        reader.readtext.assert_not_called()
+        assert [table['Name'].tolist() for table in tables] == [["An"], ["Binh"]]
+
+    def test_page_of_another_size_read_alone(self, service):
+        """Test that a page without a same-sized partner is read with readtext."""
+        reader = service.easyocr_reader
+        reader.readtext_batched.return_value = [[easyocr_line("Name", 0)]] * 2
+        reader.readtext.return_value = [easyocr_line("Class", 0), easyocr_line("10A1", 100)]
+        pages = [np.zeros((200, 100), np.uint8), np.zeros((300, 100), np.uint8), np.zeros((200, 100), np.uint8)]
+
+        tables = service.extract_tables_batch(pages)
+
+        assert len(reader.readtext_batched.call_args[0][0]) == 2
+        assert reader.readtext.call_args[0][0] is pages[1]
+        assert tables[1]['Class'].tolist() == ["10A1"]
+
+    def test_failed_batch_gives_empty_tables(self, service):
+        """Test that an EasyOCR failure leaves empty tables for its pages only."""
+        service.easyocr_reader.readtext_batched.side_effect = RuntimeError("out of memory")
+
+        tables = service.extract_tables_batch([np.zeros((200, 100), np.uint8)] * 2)
+
+        assert len(tables) == 2
+        assert all(table.empty for table in tables)
+
+
+class TestExtractTablesBatchWithTesseract:
+    """Test cases for extract_tables_batch when Tesseract reads the pages."""
+
+    def test_pages_read_in_parallel_keep_their_order(self):
+        """Test that every page is read by Tesseract and its table lands at the page's position."""
+        with patch.object(TableOCRService, '_initialize_easyocr'):
+            service = TableOCRService()
+        service._have_tesseract = True
+        service.easyocr_reader = MagicMock()
+        service.preprocess_image_for_table = lambda image: image
+
+        def image_to_data(image, **kwargs):
+            value = str(int(image[0, 0]))
+            return {'text': ["Page", value], 'conf': [95, 95], 'left': [0, 0], 'top': [0, 50]}
+
+        pages = [np.full((20, 20), value, np.uint8) for value in range(6)]
+        with patch('src.services.table_ocr_service.pytesseract.image_to_data', side_effect=image_to_data):
+            tables = service.extract_tables_batch(pages)
+
+        assert [table['Page'].tolist() for table in tables] == [[str(value)] for value in range(6)]
+        service.easyocr_reader.readtext.assert_not_called()
+        service.easyocr_reader.readtext_batched.assert_not_called()
+
+    def test_no_pages(self):
+        """Test that an empty batch gives no tables."""
+        with patch.object(TableOCRService, '_initialize_easyocr'):
+            service = TableOCRService()
+
+        assert service.extract_tables_batch([]) == []
+
+
+class TestWithoutTesseract:
+    """Test cases for a service on a machine without Tesseract."""
+
+    @pytest.fixture
+    def service(self):
+        """Fixture for a service that found no Tesseract and whose EasyOCR reader is a mock."""
+        with patch.object(TableOCRService, '_initialize_easyocr'), \
+             patch('src.services.table_ocr_service.pytesseract.get_tesseract_version',
+                   side_effect=EnvironmentError("tesseract is not installed")):
+            instance = TableOCRService()
+        instance.easyocr_reader = MagicMock()
+        return instance
+
+    def test_tesseract_detected_once(self, service):
+        """Test that the missing binary is noticed when the service is built."""
+        assert not service._have_tesseract
+
+    def test_original_image_read_by_easyocr(self, service):
+        """Test that tables are read from the original image without preprocessing it."""
+        service.easyocr_reader.readtext.return_value = [easyocr_line("Name", 0), easyocr_line("An", 100)]
+        image = np.zeros((200, 100, 3), np.uint8)
+
+        with patch.object(service, 'preprocess_image_for_table') as mock_preprocess, \
+             patch('src.services.table_ocr_service.pytesseract.image_to_data') as mock_tesseract:
+            table = service.extract_table_data(image)
+            tables = service.extract_tables_batch([image])
+
+        mock_preprocess.assert_not_called()
+        mock_tesseract.assert_not_called()
+        assert service.easyocr_reader.readtext.call_args[0][0] is image
+        assert table['Name'].tolist() == tables[0]['Name'].tolist() == ["An"]
+
+    def test_metadata_read_by_easyocr(self, service):
+        """Test that metadata comes from EasyOCR without trying Tesseract."""
+        service.easyocr_reader.readtext.return_value = [easyocr_line("Lớp: 10A1", 0)]
+
+        with patch('src.services.table_ocr_service.pytesseract.image_to_string') as mock_tesseract:
+            metadata = service.detect_metadata(np.zeros((10, 10), np.uint8))
+
+        mock_tesseract.assert_not_called()
+        assert metadata == {'class': "10A1"}
+
+
+class TestDetectMetadata:
+    """Test cases for TableOCRService.detect_metadata."""
+
+    def test_fields_found_in_any_case(self):
+        """Test that each field takes the first pattern that matches, ignoring case."""
+        with patch.object(TableOCRService, '_initialize_easyocr'):
+            service = TableOCRService()
+        text = "TRƯỜNG THPT Lê Lợi\nHọc sinh: Nguyễn An\nlớp: 10A1\nGrade: 10\nNăm học 2024-2025"
+
+        service._have_tesseract = True
+
+        with patch('src.services.table_ocr_service.pytesseract.image_to_string', return_value=text):
+            metadata = service.detect_metadata(np.zeros((10, 10), np.uint8))
+
+        assert metadata == {
+            'student_name': "Nguyễn An",
+            'class': "10A1",
+            'school': "THPT Lê Lợi",
+            'year': "2024-2025",
+        }
+
+
+class TestGroupTextIntoTable:
+    """Test cases for TableOCRService._group_text_into_table."""
+
+    @pytest.fixture
+    def service(self):
+        """Fixture for a service without an EasyOCR reader."""
+        with patch.object(TableOCRService, '_initialize_easyocr'):
+            return TableOCRService()
+
+    def test_rows_grouped_and_sorted(self, service):
+        """Test that words are grouped by line and ordered left to right, dropping weak or blank words."""
+        ocr_data = {
+            'text': ["Điểm", " Tên ", "8.5", "", "An", "noise"],
+            'conf': ['91.5', 96, 88, -1, '90', '30.9'],
+            'left': [200, 10, 210, 0, 12, 300],
+            'top': [5, 0, 52, 0, 45, 50],
+        }
+
+        assert service._group_text_into_table(ocr_data) == [["Tên", "Điểm"], ["An", "8.5"]]
+
+    def test_no_confident_words(self, service):
+        """Test that nothing is grouped when every word is rejected."""
+        ocr_data = {'text': ["", "x"], 'conf': [-1, 10], 'left': [0, 0], 'top': [0, 0]}
+
+        assert service._group_text_into_table(ocr_data) == []